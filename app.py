@@ -3,9 +3,220 @@ import os
 import sys
 import subprocess
 import threading
+import time
+import tkinter as tk
+from collections import deque
+from typing import Optional
 import customtkinter as ctk
 from tkinter import filedialog, messagebox
-from downloader import UniversalDownloader
+from downloader import SITE_REGISTRY, JobControl, JobStore, Stage, UniversalDownloader, format_bytes
+
+
+# 다운로드 형식별 출력 컨테이너 (표시 이름 -> 컨테이너)
+CONTAINER_OPTIONS = {
+    "video": {"MP4": "mp4", "MKV": "mkv"},
+    "audio": {"MP3": "mp3", "M4A": "m4a", "Opus": "opus", "원본 유지": "auto"},
+}
+
+# 대기열 설정
+QUEUE_WORKERS = 3  # 동시에 진행할 작업 수
+QUEUE_REFRESH_MS = 250  # 화면 갱신 주기 - 진행률 변경은 모아서 이 주기로만 반영
+QUEUE_ROW_HEIGHT = 24
+QUEUE_SORTS = ["추가순", "상태", "사이트", "진행률"]
+
+
+# 작업 단계 표시 이름/색 (Stage 순서)
+STAGE_LABELS = ["대기", "분석 중", "다운로드", "변환 중", "완료", "실패", "취소", "일시정지"]
+STAGE_COLORS = ["#8a8a8a", "#1f6aa5", "#1f6aa5", "#1f6aa5", "#2fa572", "#d64545", "#8a8a8a", "#c28a1f"]
+
+
+class QueueStore:
+    """대기열 작업 목록 - 진행 상태는 JobStore의 숫자 기록, 나머지는 열 단위 목록으로 보관"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.jobs = JobStore()
+        self.urls = []
+        self.sites = []
+        self.kinds = []
+        self.containers = []
+        self.titles = []  # 완료 후 알게 된 제목 (없으면 None - URL 표시)
+        self._keys = set()  # (사이트, 미디어 ID, 형식, 컨테이너) - 중복 추가 방지
+        self._pending = deque()
+        self._finished = deque(maxlen=1000)  # 최근 완료 시각 (처리량 계산)
+        self.version = 0  # 추가/종료 시 증가 (목록 재정렬 필요)
+
+    def __len__(self):
+        return len(self.jobs)
+
+    def add(self, route, kind: str, container: str) -> bool:
+        """작업 추가 - 이미 같은 작업이 있으면 False"""
+        key = (route.site, route.media_id or route.url, kind, container)
+        with self._lock:
+            if key in self._keys:
+                return False
+            self._keys.add(key)
+            self._pending.append(self.jobs.add())
+            self.urls.append(route.source_url)
+            self.sites.append(route.site)
+            self.kinds.append(kind)
+            self.containers.append(container)
+            self.titles.append(None)
+            self.version += 1
+        return True
+
+    def next_pending(self) -> Optional[int]:
+        """다음 대기 작업을 시작 상태로 전환 - index, 없으면 None"""
+        with self._lock:
+            while self._pending:
+                index = self._pending.popleft()
+                record = self.jobs[index]
+                if record.stage == Stage.QUEUED:
+                    record.start()
+                    self.version += 1
+                    return index
+        return None
+
+    def finish(self, index: int, success: bool, title: Optional[str] = None):
+        with self._lock:
+            self.jobs[index].finish(success)
+            if title:
+                self.titles[index] = title
+            if success:
+                self._finished.append(time.monotonic())
+            self.version += 1
+
+    def cancel_running(self):
+        """진행 중인 작업 취소 요청 (대기 작업은 그대로)"""
+        for index in range(len(self.jobs)):
+            record = self.jobs[index]
+            if Stage.RESOLVING <= record.stage <= Stage.PROCESSING:
+                record.cancel()
+
+    def throughput(self, window: float = 60) -> float:
+        """최근 window초 동안 분당 완료 건수"""
+        since = time.monotonic() - window
+        return sum(1 for t in self._finished if t >= since) * 60 / window
+
+    def view(self, stage: Optional[int], site: Optional[str], sort: str) -> list:
+        """필터/정렬이 적용된 작업 index 목록"""
+        records, sites = self.jobs, self.sites
+        indices = [i for i in range(len(records))
+                   if (stage is None or records[i].stage == stage) and (site is None or sites[i] == site)]
+        if sort == "상태":
+            indices.sort(key=lambda i: records[i].stage)
+        elif sort == "사이트":
+            indices.sort(key=sites.__getitem__)
+        elif sort == "진행률":
+            indices.sort(key=lambda i: records[i].percent, reverse=True)
+        return indices
+
+
+class QueueView(ctk.CTkFrame):
+    """대기열 목록 - 보이는 줄 수만큼의 캔버스 항목을 재사용하여 작업 수와 무관하게 그림"""
+
+    BG = ("#ebebeb", "#2b2b2b")
+    ROW_BG = ("#dbdbdb", "#333333")
+    TEXT = ("#1a1a1a", "#dce4ee")
+    BAR = "#1f6aa5"
+
+    def __init__(self, master, store: QueueStore, **kwargs):
+        super().__init__(master, **kwargs)
+        self.store = store
+        self.indices = []  # 현재 필터/정렬 결과
+        self.top = 0  # 맨 위에 보이는 줄
+        self._slots = []
+        dark = ctk.get_appearance_mode() == "Dark"
+        self._colors = {key: value[dark] if isinstance(value, tuple) else value
+                        for key, value in (("bg", self.BG), ("row", self.ROW_BG), ("text", self.TEXT))}
+
+        self.canvas = tk.Canvas(self, bg=self._colors["bg"], highlightthickness=0)
+        self.canvas.pack(side="left", fill="both", expand=True)
+        self.scrollbar = ctk.CTkScrollbar(self, command=self._on_scrollbar)
+        self.scrollbar.pack(side="right", fill="y")
+
+        self.canvas.bind("<Configure>", lambda e: self._build_slots())
+        self.canvas.bind("<MouseWheel>", lambda e: self.scroll(-1 if e.delta > 0 else 1, 3))
+        self.canvas.bind("<Button-4>", lambda e: self.scroll(-1, 3))
+        self.canvas.bind("<Button-5>", lambda e: self.scroll(1, 3))
+
+    @property
+    def visible_rows(self) -> int:
+        return max(1, self.canvas.winfo_height() // QUEUE_ROW_HEIGHT)
+
+    def _build_slots(self):
+        """창 크기에 맞춰 줄 항목 생성 (항목 수 = 보이는 줄 수)"""
+        self.canvas.delete("all")
+        width = self.canvas.winfo_width()
+        self._slots = []
+        for row in range(self.visible_rows + 1):
+            y = row * QUEUE_ROW_HEIGHT
+            mid = y + QUEUE_ROW_HEIGHT // 2
+            self._slots.append({
+                'bg': self.canvas.create_rectangle(0, y, width, y + QUEUE_ROW_HEIGHT, width=0,
+                                                   fill=self._colors["row"] if row % 2 else self._colors["bg"]),
+                'state': self.canvas.create_text(8, mid, anchor="w", font=("", 11)),
+                'site': self.canvas.create_text(70, mid, anchor="w", fill=self._colors["text"], font=("", 11)),
+                'title': self.canvas.create_text(150, mid, anchor="w", fill=self._colors["text"], font=("", 11)),
+                'bar_bg': self.canvas.create_rectangle(width - 130, mid - 3, width - 50, mid + 3,
+                                                       width=0, fill="#4a4a4a"),
+                'bar': self.canvas.create_rectangle(width - 130, mid - 3, width - 130, mid + 3,
+                                                    width=0, fill=self.BAR),
+                'percent': self.canvas.create_text(width - 8, mid, anchor="e", fill=self._colors["text"],
+                                                   font=("", 11)),
+            })
+        self._title_chars = max(10, (width - 300) // 7)
+        self.draw()
+
+    def set_indices(self, indices: list):
+        self.indices = indices
+        self.top = min(self.top, max(0, len(indices) - self.visible_rows))
+
+    def scroll(self, direction: int, rows: int = 1):
+        self.top = max(0, min(self.top + direction * rows, len(self.indices) - self.visible_rows))
+        self.draw()
+
+    def _on_scrollbar(self, *args):
+        if args[0] == "moveto":
+            self.top = int(float(args[1]) * len(self.indices))
+            self.scroll(0)
+        elif args[0] == "scroll":
+            self.scroll(int(args[1]), self.visible_rows if args[2] == "pages" else 1)
+
+    def draw(self):
+        """보이는 줄만 현재 상태로 다시 그림"""
+        store, canvas = self.store, self.canvas
+        visible = self.indices[self.top:self.top + len(self._slots)]
+        snapshot = store.jobs.snapshot(visible)
+        for row, slot in enumerate(self._slots):
+            if row >= len(visible):
+                for key in ('state', 'site', 'title', 'percent'):
+                    canvas.itemconfigure(slot[key], text="")
+                canvas.itemconfigure(slot['bar_bg'], state="hidden")
+                canvas.itemconfigure(slot['bar'], state="hidden")
+                continue
+            i = visible[row]
+            stage, percent, bytes_done, bytes_total, _, _ = snapshot[row]
+            title = store.titles[i] or store.urls[i]
+            if len(title) > self._title_chars:
+                title = title[:self._title_chars - 1] + "…"
+            if bytes_total or stage == Stage.DONE:
+                progress = f"{percent:.0f}%"
+            else:
+                progress = format_bytes(bytes_done) if bytes_done else ""  # 전체 크기를 모르는 스트림
+            canvas.itemconfigure(slot['state'], text=STAGE_LABELS[stage], fill=STAGE_COLORS[stage])
+            canvas.itemconfigure(slot['site'], text=store.sites[i])
+            canvas.itemconfigure(slot['title'], text=title)
+            canvas.itemconfigure(slot['percent'], text=progress)
+            canvas.itemconfigure(slot['bar_bg'], state="normal")
+            canvas.itemconfigure(slot['bar'], state="normal")
+            x0, y0, x1, y1 = canvas.coords(slot['bar_bg'])
+            canvas.coords(slot['bar'], x0, y0, x0 + (x1 - x0) * percent / 100, y1)
+        total = len(self.indices)
+        if total:
+            self.scrollbar.set(self.top / total, min(1.0, (self.top + self.visible_rows) / total))
+        else:
+            self.scrollbar.set(0, 1)
 
 
 class YouTubeDownloaderApp(ctk.CTk):
@@ -16,8 +227,8 @@ class YouTubeDownloaderApp(ctk.CTk):
 
         # 앱 설정
         self.title("YouTube Downloader")
-        self.geometry("600x580")
-        self.minsize(550, 550)
+        self.geometry("720x860")
+        self.minsize(650, 760)
 
         # 테마 설정
         ctk.set_appearance_mode("dark")
@@ -26,12 +237,25 @@ class YouTubeDownloaderApp(ctk.CTk):
         # 다운로더 인스턴스
         self.downloader = UniversalDownloader()
         self.is_downloading = False
+        self.control = None  # 진행 중인 작업의 취소/일시정지 제어
+        self.paused_job = None  # 일시정지된 작업 (url, 저장 경로, 형식, 컨테이너) - 재개 시 이어받음
+
+        # 사전 추출 상태 (URL 입력 후 디바운스)
+        self._prefetch_job = None
+        self._prefetched_url = None
+
+        # 대기열 (여러 작업 일괄 처리)
+        self.queue = QueueStore()
+        self.queue_running = False
+        self._queue_threads = 0  # 실행 중인 대기열 스레드 수
+        self._queue_drawn = None  # 마지막으로 그린 (목록 버전, 필터/정렬)
 
         # 기본 저장 경로
         self.save_path = os.path.expanduser("~/Downloads")
 
         # UI 구성
         self._create_widgets()
+        self.after(QUEUE_REFRESH_MS, self._refresh_queue)
 
         # macOS 복사/붙여넣기 단축키 바인딩
         self._setup_clipboard_bindings()
@@ -71,6 +295,7 @@ class YouTubeDownloaderApp(ctk.CTk):
             font=ctk.CTkFont(size=13)
         )
         self.url_entry.pack(side="left", fill="x", expand=True, padx=(0, 10))
+        self.url_entry.bind("<KeyRelease>", lambda e: self._schedule_prefetch())
 
         self.paste_btn = ctk.CTkButton(
             self.url_inner_frame,
@@ -130,22 +355,34 @@ class YouTubeDownloaderApp(ctk.CTk):
 
         self.video_radio = ctk.CTkRadioButton(
             self.radio_frame,
-            text="영상 (MP4)",
+            text="영상",
             variable=self.type_var,
             value="video",
-            font=ctk.CTkFont(size=13)
+            font=ctk.CTkFont(size=13),
+            command=self._update_container_options
         )
         self.video_radio.pack(side="left", padx=(0, 30))
 
         self.audio_radio = ctk.CTkRadioButton(
             self.radio_frame,
-            text="음원 (MP3)",
+            text="음원",
             variable=self.type_var,
             value="audio",
-            font=ctk.CTkFont(size=13)
+            font=ctk.CTkFont(size=13),
+            command=self._update_container_options
         )
         self.audio_radio.pack(side="left")
 
+        # 출력 컨테이너 (원본 코덱이 맞으면 재인코딩 없이 복사)
+        self.container_var = ctk.StringVar(value="MP4")
+        self.container_menu = ctk.CTkOptionMenu(
+            self.radio_frame,
+            variable=self.container_var,
+            values=list(CONTAINER_OPTIONS["video"]),
+            width=110
+        )
+        self.container_menu.pack(side="right")
+
         # 진행률 바
         self.progress_frame = ctk.CTkFrame(self.main_frame)
         self.progress_frame.pack(fill="x", pady=10)
@@ -161,15 +398,103 @@ class YouTubeDownloaderApp(ctk.CTk):
         self.progress_bar.pack(fill="x", padx=10, pady=(0, 10))
         self.progress_bar.set(0)
 
-        # 다운로드 버튼
+        # 다운로드/일시정지/취소 버튼
+        self.button_frame = ctk.CTkFrame(self.main_frame, fg_color="transparent")
+        self.button_frame.pack(fill="x", pady=20)
+
         self.download_btn = ctk.CTkButton(
-            self.main_frame,
+            self.button_frame,
             text="다운로드 시작",
             height=50,
             font=ctk.CTkFont(size=16, weight="bold"),
             command=self._start_download
         )
-        self.download_btn.pack(fill="x", pady=20)
+        self.download_btn.pack(side="left", fill="x", expand=True, padx=(0, 10))
+
+        self.cancel_btn = ctk.CTkButton(
+            self.button_frame,
+            text="취소",
+            width=80,
+            height=50,
+            state="disabled",
+            command=self._cancel_download
+        )
+        self.cancel_btn.pack(side="right")
+
+        self.pause_btn = ctk.CTkButton(
+            self.button_frame,
+            text="일시정지",
+            width=80,
+            height=50,
+            state="disabled",
+            command=self._toggle_pause
+        )
+        self.pause_btn.pack(side="right", padx=(0, 10))
+
+        # 대기열 - 현재 형식/컨테이너로 작업을 추가하고 여러 개를 동시에 처리
+        self.queue_frame = ctk.CTkFrame(self.main_frame)
+        self.queue_frame.pack(fill="both", expand=True)
+
+        self.queue_bar = ctk.CTkFrame(self.queue_frame, fg_color="transparent")
+        self.queue_bar.pack(fill="x", padx=10, pady=(10, 5))
+
+        self.queue_add_btn = ctk.CTkButton(
+            self.queue_bar,
+            text="대기열에 추가",
+            width=100,
+            command=self._queue_add_url
+        )
+        self.queue_add_btn.pack(side="left", padx=(0, 10))
+
+        self.queue_import_btn = ctk.CTkButton(
+            self.queue_bar,
+            text="파일에서 추가",
+            width=100,
+            command=self._queue_import_file
+        )
+        self.queue_import_btn.pack(side="left")
+
+        self.queue_start_btn = ctk.CTkButton(
+            self.queue_bar,
+            text="대기열 시작",
+            width=100,
+            command=self._toggle_queue
+        )
+        self.queue_start_btn.pack(side="right")
+
+        self.queue_filter_frame = ctk.CTkFrame(self.queue_frame, fg_color="transparent")
+        self.queue_filter_frame.pack(fill="x", padx=10, pady=(0, 5))
+
+        sites = sorted({site for cls in SITE_REGISTRY for site, _, _ in cls.SITES})
+        self.queue_state_var = ctk.StringVar(value="전체 상태")
+        self.queue_site_var = ctk.StringVar(value="전체 사이트")
+        self.queue_sort_var = ctk.StringVar(value=QUEUE_SORTS[0])
+        for variable, values in ((self.queue_state_var, ["전체 상태"] + STAGE_LABELS),
+                                 (self.queue_site_var, ["전체 사이트"] + sites),
+                                 (self.queue_sort_var, QUEUE_SORTS)):
+            ctk.CTkOptionMenu(
+                self.queue_filter_frame,
+                variable=variable,
+                values=values,
+                width=100,
+                command=lambda _: self._refresh_queue(reschedule=False)
+            ).pack(side="left", padx=(0, 10))
+
+        self.queue_summary_label = ctk.CTkLabel(
+            self.queue_filter_frame,
+            text="",
+            font=ctk.CTkFont(size=12)
+        )
+        self.queue_summary_label.pack(side="right")
+
+        self.queue_view = QueueView(self.queue_frame, self.queue, fg_color="transparent")
+        self.queue_view.pack(fill="both", expand=True, padx=10, pady=(0, 10))
+
+    def _update_container_options(self):
+        """다운로드 형식에 맞는 컨테이너 목록으로 변경"""
+        options = list(CONTAINER_OPTIONS[self.type_var.get()])
+        self.container_menu.configure(values=options)
+        self.container_var.set(options[0])
 
     def _paste_url(self):
         """URL 입력창에 클립보드 내용 붙여넣기"""
@@ -177,9 +502,35 @@ class YouTubeDownloaderApp(ctk.CTk):
             text = self.clipboard_get()
             self.url_entry.delete(0, "end")
             self.url_entry.insert(0, text)
+            self._schedule_prefetch()
         except:
             pass
 
+    def _schedule_prefetch(self):
+        """URL 입력이 멈추면 사전 추출 예약 (디바운스)"""
+        if self._prefetch_job:
+            self.after_cancel(self._prefetch_job)
+        self._prefetch_job = self.after(500, self._prefetch_url)
+
+    def _prefetch_url(self):
+        """유효한 URL이면 다운로드 클릭 전에 백그라운드 추출 시작"""
+        self._prefetch_job = None
+        url = self.url_entry.get().strip()
+        if not url or url == self._prefetched_url:
+            return
+        if not self.downloader.validate_url(url):
+            return
+        # macOS 패키징 앱에서는 Aikive/Threads 추출 불가
+        if self._site_unavailable(self.downloader.route(url).site):
+            return
+        self._prefetched_url = url
+        self.downloader.prefetch(url)
+
+    @staticmethod
+    def _site_unavailable(site: str) -> bool:
+        """macOS 패키징 앱에서는 브라우저가 필요한 사이트 사용 불가 (Chromium 번들 불가)"""
+        return getattr(sys, 'frozen', False) and sys.platform == 'darwin' and site in ('aikive', 'threads')
+
     def _setup_clipboard_bindings(self):
         """macOS Cmd+C/V/X/A 단축키 설정"""
         # CTkEntry 내부의 실제 Entry 위젯에 바인딩
@@ -199,6 +550,8 @@ class YouTubeDownloaderApp(ctk.CTk):
             current = widget.get()
             widget.delete(0, "end")
             widget.insert(0, text)
+            if widget is self.url_entry:
+                self._schedule_prefetch()
         except:
             pass
         return "break"
@@ -264,10 +617,9 @@ class YouTubeDownloaderApp(ctk.CTk):
             return
 
         # macOS 패키징 앱에서 Aikive/Threads 지원 불가 (Chromium 번들 불가)
-        if getattr(sys, 'frozen', False) and sys.platform == 'darwin':
-            if ('aikive.com' in url or 'threads.net' in url or 'threads.com' in url):
-                messagebox.showwarning("안내", "macOS 앱에서는 Aikive/Threads가 지원되지 않습니다.\n\nYouTube, Instagram URL만 지원됩니다.")
-                return
+        if self._site_unavailable(self.downloader.route(url).site):
+            messagebox.showwarning("안내", "macOS 앱에서는 Aikive/Threads가 지원되지 않습니다.\n\nYouTube, Instagram URL만 지원됩니다.")
+            return
 
         # 저장 경로 검증
         if not os.path.isdir(save_path):
@@ -275,39 +627,98 @@ class YouTubeDownloaderApp(ctk.CTk):
             return
 
         # 다운로드 시작
+        self.paused_job = None
+        download_type = self.type_var.get()
+        container = CONTAINER_OPTIONS[download_type][self.container_var.get()]
+        self._run_job(url, save_path, download_type, container)
+
+    def _run_job(self, url: str, save_path: str, download_type: str, container: str):
+        """다운로드 스레드 시작 (새 작업 또는 일시정지된 작업 재개)"""
         self.is_downloading = True
+        self.control = JobControl()
         self.download_btn.configure(state="disabled", text="다운로드 중...")
+        self.pause_btn.configure(state="normal", text="일시정지")
+        self.cancel_btn.configure(state="normal")
 
-        download_type = self.type_var.get()
         thread = threading.Thread(
             target=self._download_thread,
-            args=(url, save_path, download_type),
+            args=(url, save_path, download_type, container, self.control),
             daemon=True
         )
         thread.start()
 
-    def _download_thread(self, url: str, save_path: str, download_type: str):
+    def _download_thread(self, url: str, save_path: str, download_type: str, container: str,
+                         control: JobControl):
         """다운로드 스레드"""
         def progress_callback(percent, status):
             self.after(0, lambda: self._update_progress(percent, status))
 
         try:
             if download_type == "video":
-                success = self.downloader.download_video(url, save_path, progress_callback)
+                success = self.downloader.download_video(url, save_path, progress_callback,
+                                                         control=control, container=container)
             else:
-                success = self.downloader.download_audio(url, save_path, progress_callback)
+                success = self.downloader.download_audio(url, save_path, progress_callback,
+                                                         control=control, container=container)
 
             if success:
                 self.after(0, lambda: self._download_complete())
+            elif control.stopped:
+                job = (url, save_path, download_type, container)
+                self.after(0, lambda: self._download_stopped(job, control))
             else:
                 self.after(0, lambda: self._download_failed())
         except Exception as e:
             self.after(0, lambda: self._download_failed(str(e)))
 
+    def _toggle_pause(self):
+        """일시정지/재개"""
+        if self.is_downloading and self.control:
+            self.pause_btn.configure(state="disabled")
+            self.status_label.configure(text="일시정지 중...")
+            self.control.pause()
+        elif self.paused_job:
+            job, self.paused_job = self.paused_job, None
+            self._run_job(*job)
+
+    def _cancel_download(self):
+        """다운로드 취소 (일시정지된 작업도 취소)"""
+        if self.is_downloading and self.control:
+            self.cancel_btn.configure(state="disabled")
+            self.pause_btn.configure(state="disabled")
+            self.status_label.configure(text="취소 중...")
+            self.control.cancel()
+        elif self.paused_job:
+            self.paused_job = None
+            self._reset_buttons()
+            self.progress_bar.set(0)
+            self.status_label.configure(text="취소됨")
+
+    def _reset_buttons(self):
+        """버튼 초기 상태로"""
+        self.download_btn.configure(state="normal", text="다운로드 시작")
+        self.pause_btn.configure(state="disabled", text="일시정지")
+        self.cancel_btn.configure(state="disabled")
+
+    def _download_stopped(self, job: tuple, control: JobControl):
+        """취소/일시정지로 중단된 작업 처리"""
+        self.is_downloading = False
+        self.control = None
+        if control.state == JobControl.PAUSED:
+            self.paused_job = job
+            self.download_btn.configure(state="normal", text="다운로드 시작")
+            self.pause_btn.configure(state="normal", text="재개")
+            self.cancel_btn.configure(state="normal")
+        else:
+            self._reset_buttons()
+            self.progress_bar.set(0)
+        self.status_label.configure(text=control.status_text())
+
     def _download_complete(self):
         """다운로드 완료 처리"""
         self.is_downloading = False
-        self.download_btn.configure(state="normal", text="다운로드 시작")
+        self.control = None
+        self._reset_buttons()
         self.status_label.configure(text="다운로드 완료!")
         self.progress_bar.set(1)
         messagebox.showinfo("완료", "다운로드가 완료되었습니다!")
@@ -327,10 +738,125 @@ class YouTubeDownloaderApp(ctk.CTk):
         except Exception as e:
             print(f"폴더 열기 실패: {e}")
 
+    def _selected_format(self) -> tuple:
+        """현재 선택된 (다운로드 형식, 컨테이너)"""
+        download_type = self.type_var.get()
+        return download_type, CONTAINER_OPTIONS[download_type][self.container_var.get()]
+
+    def _queue_add_url(self):
+        """입력한 URL을 현재 형식으로 대기열에 추가"""
+        url = self.url_entry.get().strip()
+        route = self.downloader.route(url) if url else None
+        if route is None:
+            messagebox.showerror("오류", "지원하지 않는 URL입니다.\n(YouTube, Instagram, Threads, Aikive 지원)")
+            return
+        if self._site_unavailable(route.site):
+            messagebox.showwarning("안내", "macOS 앱에서는 Aikive/Threads가 지원되지 않습니다.")
+            return
+        if self.queue.add(route, *self._selected_format()):
+            self.url_entry.delete(0, "end")
+            self.status_label.configure(text="대기열에 추가됨")
+        else:
+            self.status_label.configure(text="이미 대기열에 있는 작업입니다.")
+
+    def _queue_import_file(self):
+        """텍스트 파일의 URL 목록을 정규화/중복 제거하여 대기열에 추가"""
+        path = filedialog.askopenfilename(filetypes=[("텍스트 파일", "*.txt"), ("모든 파일", "*.*")])
+        if not path:
+            return
+        try:
+            with open(path, encoding='utf-8') as f:
+                lines = f.readlines()
+        except (OSError, UnicodeDecodeError) as e:
+            messagebox.showerror("오류", f"파일을 읽을 수 없습니다: {e}")
+            return
+        download_type, container = self._selected_format()
+        stats = {}
+        added = sum(self.queue.add(route, download_type, container)
+                    for route in self.downloader.ingest(lines, stats)
+                    if not self._site_unavailable(route.site))
+        self.status_label.configure(
+            text=f"대기열에 {added:,}건 추가 (미지원 {stats['unsupported']:,} / 중복 {stats['duplicate']:,})")
+
+    def _toggle_queue(self):
+        """대기열 시작/중지 - 중지하면 진행 중인 작업만 취소하고 대기 작업은 남김"""
+        if self.queue_running:
+            self.queue_running = False
+            self.queue.cancel_running()
+            self.queue_start_btn.configure(state="disabled", text="중지 중...")
+            return
+        save_path = self.path_entry.get().strip()
+        if not os.path.isdir(save_path):
+            messagebox.showerror("오류", "유효한 저장 경로를 선택해주세요.")
+            return
+        self.queue_running = True
+        self.queue_start_btn.configure(text="대기열 중지")
+        self._queue_threads = QUEUE_WORKERS
+        for _ in range(QUEUE_WORKERS):
+            threading.Thread(target=self._queue_worker, args=(save_path,), daemon=True).start()
+
+    def _queue_worker(self, save_path: str):
+        """대기열 작업을 하나씩 꺼내 처리 (QUEUE_WORKERS개 스레드가 동시에 실행)"""
+        queue = self.queue
+        while self.queue_running:
+            index = queue.next_pending()
+            if index is None:
+                break
+            control = queue.jobs[index]
+            download = self.downloader.download_video if queue.kinds[index] == "video" \
+                else self.downloader.download_audio
+            metadata = {}
+            try:
+                # 진행 상황은 JobRecord에 숫자로만 기록 (문자열 콜백 없음)
+                success = download(queue.urls[index], save_path, None,
+                                   metadata=metadata, control=control, container=queue.containers[index])
+            except Exception as e:
+                print(f"다운로드 실패: {e}")
+                success = False
+            title = metadata.get('title')
+            if not title and metadata.get('filepath'):
+                title = os.path.splitext(os.path.basename(metadata['filepath']))[0]
+            queue.finish(index, success, title)
+        self.after(0, self._queue_worker_done)
+
+    def _queue_worker_done(self):
+        """대기열 스레드 종료 - 모두 끝나면 버튼 초기화"""
+        self._queue_threads -= 1
+        if self._queue_threads == 0:
+            self.queue_running = False
+            self.queue_start_btn.configure(state="normal", text="대기열 시작")
+
+    def _refresh_queue(self, reschedule: bool = True):
+        """갱신 주기마다 대기열 화면을 한 번에 반영 (작업 스레드는 JobRecord에 숫자만 기록)"""
+        queue = self.queue
+        state = self.queue_state_var.get()
+        site = self.queue_site_var.get()
+        sort = self.queue_sort_var.get()
+        summary = queue.jobs.summary()
+        counts = summary['counts']
+        active = sum(counts[Stage.RESOLVING:Stage.PROCESSING + 1])
+        filters = (queue.version, state, site, sort)
+        # 진행 중인 작업은 단계/진행률이 계속 바뀌므로 정렬/필터도 다시 적용
+        if filters != self._queue_drawn or active:
+            self.queue_view.set_indices(queue.view(
+                STAGE_LABELS.index(state) if state in STAGE_LABELS else None,
+                None if site == "전체 사이트" else site,
+                sort
+            ))
+            self.queue_view.draw()
+            self._queue_drawn = filters
+        if len(queue):
+            self.queue_summary_label.configure(text=" · ".join(
+                [f"{label} {count:,}" for label, count in zip(STAGE_LABELS, counts) if count]
+                + [f"{format_bytes(summary['speed'])}/s", f"{queue.throughput():.1f}건/분"]))
+        if reschedule:
+            self.after(QUEUE_REFRESH_MS, self._refresh_queue)
+
     def _download_failed(self, error_msg: str = ""):
         """다운로드 실패 처리"""
         self.is_downloading = False
-        self.download_btn.configure(state="normal", text="다운로드 시작")
+        self.control = None
+        self._reset_buttons()
         self.progress_bar.set(0)
         self.status_label.configure(text="다운로드 실패")
         messagebox.showerror("오류", f"다운로드 실패: {error_msg}" if error_msg else "다운로드에 실패했습니다.")
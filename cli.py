@@ -0,0 +1,187 @@
+"""MTDown 명령줄 도구 - 대량 작업용 (GUI 없이 실행)"""
+import argparse
+import json
+import sys
+import urllib.error
+from downloader import AUDIO_CONTAINERS, VIDEO_CONTAINERS, UniversalDownloader, format_bytes, write_catalog
+
+
+def read_urls(path: str):
+    """텍스트 파일에서 URL 읽기 (빈 줄, # 주석 제외)"""
+    fp = sys.stdin if path == '-' else open(path, encoding='utf-8')
+    try:
+        for line in fp:
+            line = line.strip()
+            if line and not line.startswith('#'):
+                yield line
+    finally:
+        if fp is not sys.stdin:
+            fp.close()
+
+
+def print_ingest_stats(stats: dict):
+    """URL 정규화/중복 제거 결과 요약 출력"""
+    print(f"입력 {stats['total']}건 / 미지원 {stats['unsupported']}건 / 중복 {stats['duplicate']}건",
+          file=sys.stderr)
+
+
+def cmd_ingest(args) -> int:
+    """URL 목록 정규화 및 중복 제거"""
+    downloader = UniversalDownloader()
+    stats = {}
+    out = sys.stdout if args.output == '-' else open(args.output, 'w', encoding='utf-8')
+    try:
+        for route in downloader.ingest(read_urls(args.input), stats):
+            if args.json:
+                out.write(json.dumps({'site': route.site, 'id': route.media_id, 'url': route.url}) + '\n')
+            else:
+                out.write(route.url + '\n')
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    print_ingest_stats(stats)
+    return 0
+
+
+def cmd_catalog(args) -> int:
+    """메타데이터만 추출하여 카탈로그 기록 (미디어 저장 없음)"""
+    downloader = UniversalDownloader()
+    stats = {}
+    routes = downloader.ingest(read_urls(args.input), stats)
+    records = downloader.catalog((route.source_url for route in routes), workers=args.workers)
+    out = sys.stdout if args.output == '-' else open(args.output, 'w', encoding='utf-8', newline='')
+    try:
+        count = write_catalog(records, out, args.format)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    print_ingest_stats(stats)
+    print(f"카탈로그 {count}건 기록 완료", file=sys.stderr)
+    return 0
+
+
+def cmd_coordinator(args) -> int:
+    """분산 모드 코디네이터 실행"""
+    from worker import serve_coordinator
+    serve_coordinator(args.host, args.port, args.lease_timeout, args.max_attempts)
+    return 0
+
+
+def cmd_worker(args) -> int:
+    """분산 모드 워커 실행"""
+    from worker import run_workers
+    run_workers(args.coordinator, args.output, args.processes, args.exit_when_idle)
+    return 0
+
+
+def cmd_submit(args) -> int:
+    """코디네이터에 작업 등록"""
+    from worker import call
+    valid = set(AUDIO_CONTAINERS) | {'auto'} if args.kind == 'audio' else set(VIDEO_CONTAINERS)
+    if args.container and args.container not in valid:
+        print(f"{args.kind} 형식에서 지원하지 않는 컨테이너: {args.container} ({', '.join(sorted(valid))})",
+              file=sys.stderr)
+        return 2
+    format_policy = {}
+    if args.max_height is not None:
+        format_policy['max_height'] = args.max_height or None  # 0은 제한 없음
+    if args.max_filesize is not None:
+        format_policy['max_filesize'] = int(args.max_filesize * 1024 * 1024) or None
+    try:
+        result = call(args.coordinator, '/jobs',
+                      {'urls': list(read_urls(args.input)), 'kind': args.kind, 'container': args.container,
+                       'format_policy': format_policy},
+                      timeout=60)
+    except urllib.error.HTTPError as e:
+        # 코디네이터가 거부한 요청은 응답 본문의 오류 메시지 출력
+        try:
+            error = json.loads(e.read()).get('error')
+        except ValueError:
+            error = None
+        print(f"작업 등록 실패: {error or e}", file=sys.stderr)
+        return 1
+    print(f"작업 {len(result['ids'])}건 등록", file=sys.stderr)
+    return 0
+
+
+def cmd_control(args) -> int:
+    """코디네이터 작업 취소/일시정지/재개"""
+    from worker import call
+    result = call(args.coordinator, f"/jobs/{args.job_id}/{args.action}", {})
+    if not result.get('ok'):
+        print("요청을 처리할 수 없는 작업 상태입니다.", file=sys.stderr)
+        return 1
+    return 0
+
+
+def cmd_status(args) -> int:
+    """코디네이터 작업 상태 출력"""
+    from worker import call
+    snapshot = call(args.coordinator, '/jobs')
+    if args.json:
+        print(json.dumps(snapshot, ensure_ascii=False))
+    else:
+        print(' / '.join([f"{state} {count}" for state, count in sorted(snapshot['counts'].items())]
+                         + [f"{format_bytes(snapshot.get('speed', 0))}/s"]))
+    return 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog='mtdown', description='MTDown 명령줄 도구')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p = sub.add_parser('ingest', help='URL 목록 정규화 및 중복 제거')
+    p.add_argument('input', help="URL 목록 파일 (한 줄에 하나, '-'는 표준입력)")
+    p.add_argument('-o', '--output', default='-', help="출력 파일 ('-'는 표준출력)")
+    p.add_argument('--json', action='store_true', help='사이트/ID/URL을 JSON Lines로 출력')
+    p.set_defaults(func=cmd_ingest)
+
+    p = sub.add_parser('catalog', help='메타데이터 카탈로그 생성 (미디어 다운로드 없음)')
+    p.add_argument('input', help="URL 목록 파일 (한 줄에 하나, '-'는 표준입력)")
+    p.add_argument('-o', '--output', default='-', help="출력 파일 ('-'는 표준출력)")
+    p.add_argument('-f', '--format', choices=['jsonl', 'csv'], default='jsonl', help='출력 형식')
+    p.add_argument('-w', '--workers', type=int, default=8, help='동시 추출 수')
+    p.set_defaults(func=cmd_catalog)
+
+    p = sub.add_parser('coordinator', help='분산 모드 코디네이터 실행')
+    p.add_argument('--host', default='127.0.0.1',
+                   help='바인딩 주소 (다른 호스트의 워커를 받으려면 0.0.0.0 지정)')
+    p.add_argument('--port', type=int, default=8765)
+    p.add_argument('--lease-timeout', type=float, default=60, help='하트비트가 없을 때 작업 회수까지 초')
+    p.add_argument('--max-attempts', type=int, default=3, help='작업당 최대 시도 횟수')
+    p.set_defaults(func=cmd_coordinator)
+
+    p = sub.add_parser('worker', help='분산 모드 워커 실행')
+    p.add_argument('coordinator', help='코디네이터 주소 (예: http://host:8765)')
+    p.add_argument('-o', '--output', required=True, help='저장 위치 (공유 스토리지)')
+    p.add_argument('-p', '--processes', type=int, default=1, help='이 호스트에서 실행할 워커 프로세스 수')
+    p.add_argument('--exit-when-idle', action='store_true', help='대기열이 비면 종료')
+    p.set_defaults(func=cmd_worker)
+
+    p = sub.add_parser('submit', help='코디네이터에 작업 등록')
+    p.add_argument('coordinator', help='코디네이터 주소')
+    p.add_argument('input', help="URL 목록 파일 (한 줄에 하나, '-'는 표준입력)")
+    p.add_argument('-k', '--kind', choices=['video', 'audio'], default='video', help='다운로드 형식')
+    p.add_argument('-c', '--container', choices=['mp4', 'mkv', 'mp3', 'm4a', 'opus', 'auto'],
+                   help='출력 컨테이너 (기본: 영상 mp4, 음원 mp3)')
+    p.add_argument('--max-height', type=int, help='영상 최대 세로 해상도 (기본 1080, 0은 제한 없음)')
+    p.add_argument('--max-filesize', type=float, help='영상 최대 예상 크기 (MB, 기본 제한 없음)')
+    p.set_defaults(func=cmd_submit)
+
+    p = sub.add_parser('control', help='작업 취소/일시정지/재개')
+    p.add_argument('coordinator', help='코디네이터 주소')
+    p.add_argument('job_id', help='작업 ID')
+    p.add_argument('action', choices=['cancel', 'pause', 'resume'])
+    p.set_defaults(func=cmd_control)
+
+    p = sub.add_parser('status', help='코디네이터 작업 상태 조회')
+    p.add_argument('coordinator', help='코디네이터 주소')
+    p.add_argument('--json', action='store_true', help='전체 작업 목록을 JSON으로 출력')
+    p.set_defaults(func=cmd_status)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -3,7 +3,19 @@ import re
 import os
 import sys
 import subprocess
-from typing import Callable, Optional
+import threading
+import time
+import copy
+import csv
+import json
+import ssl
+import urllib.request
+import uuid
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from enum import IntEnum
+from html.parser import HTMLParser
+from typing import Callable, Iterable, Iterator, NamedTuple, Optional
 import yt_dlp
 
 # certifi는 optional (패키징 앱에서만 필요)
@@ -28,6 +40,19 @@ def get_ffmpeg_path():
     return 'ffmpeg'  # 시스템 ffmpeg 사용
 
 
+def get_ffprobe_path():
+    """번들된 ffprobe 경로 또는 시스템 ffprobe 반환 (실행파일 경로)"""
+    if getattr(sys, 'frozen', False):
+        base_path = sys._MEIPASS
+        if sys.platform == 'darwin':
+            ffprobe = os.path.join(base_path, 'ffprobe')
+        else:
+            ffprobe = os.path.join(base_path, 'ffprobe.exe')
+        if os.path.exists(ffprobe):
+            return ffprobe
+    return 'ffprobe'  # 시스템 ffprobe 사용
+
+
 def get_ffmpeg_location():
     """yt-dlp용 ffmpeg 디렉토리 경로 반환"""
     if getattr(sys, 'frozen', False):
@@ -59,56 +84,1162 @@ def setup_playwright_path():
     return False
 
 
-class YouTubeDownloader:
-    """YouTube/Instagram 영상/음원 다운로드 클래스 (yt-dlp 지원 사이트)"""
+class ResolveCache:
+    """URL별 추출 결과 캐시 - 같은 URL의 동시 추출은 한 번만 수행"""
+
+    def __init__(self, ttl: float = 600, maxsize: int = 256):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (저장 시각, 값)
+        self._pending = {}  # key -> 추출 진행 중 이벤트
+
+    def get(self, key, compute: Callable, control: Optional['JobControl'] = None):
+        """캐시된 값 반환, 없으면 compute() 실행 (진행 중인 추출이 있으면 대기)
+
+        다른 요청(사전 추출 등)이 진행 중인 추출을 기다리는 동안 control이 중지되면 바로 None 반환
+        """
+        while True:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry and time.monotonic() - entry[0] < self.ttl:
+                    self._entries.move_to_end(key)
+                    return entry[1]
+                event = self._pending.get(key)
+                if event is None:
+                    event = self._pending[key] = threading.Event()
+                    break
+            while not event.wait(0.25):
+                if control and control.stopped:
+                    return None
+
+        try:
+            value = compute()
+            # 실패(None)는 캐시하지 않음 - 다음 요청에서 다시 추출
+            if value is not None:
+                with self._lock:
+                    self._entries[key] = (time.monotonic(), value)
+                    self._entries.move_to_end(key)
+                    while len(self._entries) > self.maxsize:
+                        self._entries.popitem(last=False)
+            return value
+        finally:
+            with self._lock:
+                del self._pending[key]
+            event.set()
+
+    def discard(self, key):
+        """캐시 항목 제거 (만료된 미디어 URL 등)"""
+        with self._lock:
+            self._entries.pop(key, None)
+
+
+class JobControl:
+    """작업 취소/일시정지 요청 - 다운로드 스레드가 다음 확인 시점에 중단"""
+
+    __slots__ = ('state',)
+
+    RUNNING = 'running'
+    PAUSED = 'paused'
+    CANCELLED = 'cancelled'
+
+    def __init__(self):
+        self.state = self.RUNNING
+
+    def cancel(self):
+        """취소 - 부분 데이터 삭제"""
+        self.state = self.CANCELLED
+
+    def pause(self):
+        """일시정지 - 부분 데이터를 남겨 재개 가능"""
+        if self.state == self.RUNNING:
+            self.state = self.PAUSED
+
+    def resume(self):
+        """일시정지 해제 (같은 작업을 다시 실행하면 이어받음)"""
+        if self.state == self.PAUSED:
+            self.state = self.RUNNING
+
+    @property
+    def stopped(self) -> bool:
+        return self.state != self.RUNNING
+
+    def status_text(self) -> str:
+        return "취소됨" if self.state == self.CANCELLED else "일시정지됨"
+
+    # 진행 상태 기록 - JobControl은 기록하지 않음 (JobRecord에서 구현)
+    def set_stage(self, stage: 'Stage'):
+        pass
+
+    def progress(self, done: int, total: Optional[int] = None, speed: Optional[float] = None):
+        pass
+
+    def fail(self, code: 'ErrorCode'):
+        pass
+
+
+class Stage(IntEnum):
+    """작업 진행 단계"""
+    QUEUED = 0
+    RESOLVING = 1  # 미디어 URL/메타데이터 추출
+    DOWNLOADING = 2
+    PROCESSING = 3  # 병합/변환
+    DONE = 4
+    FAILED = 5
+    CANCELLED = 6
+    PAUSED = 7
+
+
+class ErrorCode(IntEnum):
+    """실패 원인"""
+    NONE = 0
+    NOT_FOUND = 1  # 미디어 URL을 찾지 못함
+    DOWNLOAD = 2  # 네트워크/yt-dlp 오류
+    FFMPEG = 3  # 다운로드/변환 중 ffmpeg 오류
+    UNKNOWN = 4
 
-    YOUTUBE_REGEX = re.compile(
-        r'(https?://)?(www\.)?(youtube|youtu|youtube-nocookie)\.(com|be)/'
-        r'(watch\?v=|embed/|v/|.+\?v=|shorts/)?([^&=%\?]{11})'
-    )
 
-    INSTAGRAM_REGEX = re.compile(
-        r'(https?://)?(www\.)?instagram\.com/(p|reel|reels|tv)/[\w-]+'
+class JobRecord(JobControl):
+    """대량 작업용 제어 + 진행 기록 - 숫자 필드만 보관하고 문자열은 표시할 때 생성"""
+
+    __slots__ = ('stage', 'bytes_done', 'bytes_total', 'speed', 'error', '_mark_time', '_mark_bytes')
+
+    def __init__(self):
+        super().__init__()
+        self.stage = int(Stage.QUEUED)  # Stage 값을 int로 보관 (대량 집계 시 Enum 연산 비용 회피)
+        self.bytes_done = 0
+        self.bytes_total = 0
+        self.speed = 0.0  # 바이트/초
+        self.error = ErrorCode.NONE
+        self._mark_time = 0.0
+        self._mark_bytes = 0
+
+    def start(self):
+        """(재)실행 전 초기화 - 일시정지/대기 작업을 다시 시작할 때"""
+        self.state = self.RUNNING
+        self.stage = int(Stage.RESOLVING)
+        self.bytes_done = self.bytes_total = 0
+        self.speed = 0.0
+        self.error = ErrorCode.NONE
+
+    def set_stage(self, stage: Stage):
+        self.stage = int(stage)
+
+    def progress(self, done: int, total: Optional[int] = None, speed: Optional[float] = None):
+        """받은 바이트 기록 - 속도를 주지 않으면 1초 이상 간격의 변화량으로 계산"""
+        now = time.monotonic()
+        if speed is not None:
+            self.speed = speed
+        elif done < self._mark_bytes:
+            self._mark_time, self._mark_bytes = now, done  # 다음 파일 시작
+        elif now - self._mark_time >= 1:
+            if self._mark_time:
+                self.speed = (done - self._mark_bytes) / (now - self._mark_time)
+            self._mark_time, self._mark_bytes = now, done
+        self.bytes_done = done
+        if total:
+            self.bytes_total = total
+
+    def fail(self, code: ErrorCode):
+        self.error = code
+
+    def finish(self, success: bool):
+        """작업 종료 시 최종 단계 기록"""
+        if success:
+            self.stage = int(Stage.DONE)
+        elif self.state == self.CANCELLED:
+            self.stage = int(Stage.CANCELLED)
+        elif self.state == self.PAUSED:
+            self.stage = int(Stage.PAUSED)
+        else:
+            self.stage = int(Stage.FAILED)
+            if self.error == ErrorCode.NONE:
+                self.error = ErrorCode.UNKNOWN
+        self.speed = 0.0
+
+    @property
+    def percent(self) -> float:
+        """진행률 (전체 크기를 모르면 0, 완료면 100)"""
+        if self.stage == Stage.DONE:
+            return 100.0
+        if self.bytes_total:
+            return min(100.0, self.bytes_done * 100 / self.bytes_total)
+        return 0.0
+
+
+class JobStore:
+    """JobRecord 목록 - 작업 스레드는 기록만 하고 GUI/CLI는 스냅샷을 읽어 표시"""
+
+    def __init__(self):
+        self._records = []
+        self._lock = threading.Lock()
+
+    def add(self) -> int:
+        """새 작업 기록 추가 - index 반환"""
+        with self._lock:
+            self._records.append(JobRecord())
+            return len(self._records) - 1
+
+    def __len__(self):
+        return len(self._records)
+
+    def __getitem__(self, index: int) -> JobRecord:
+        return self._records[index]
+
+    def snapshot(self, indices: Optional[Iterable[int]] = None) -> list:
+        """(단계, 진행률, 받은 바이트, 전체 바이트, 속도, 오류) 튜플 목록"""
+        records = self._records
+        if indices is not None:
+            records = [records[i] for i in indices]
+        return [(r.stage, r.percent, r.bytes_done, r.bytes_total, r.speed, r.error) for r in records]
+
+    def summary(self) -> dict:
+        """단계별 작업 수와 진행 중인 작업의 합계 속도"""
+        counts = [0] * len(Stage)
+        speed = 0.0
+        downloading = int(Stage.DOWNLOADING)
+        for r in self._records:
+            counts[r.stage] += 1
+            if r.stage == downloading:
+                speed += r.speed
+        return {'counts': counts, 'speed': speed}
+
+
+def format_bytes(size: float) -> str:
+    """바이트 수를 읽기 쉬운 단위로 (표시용)"""
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if size < 1024 or unit == 'GB':
+            return f"{size:.0f} {unit}" if unit == 'B' else f"{size:.1f} {unit}"
+        size /= 1024
+
+
+def stop_job(control: JobControl, partial_file: Optional[str], progress_callback=None) -> bool:
+    """중지된 작업 정리 - 취소면 부분 파일 삭제, 일시정지면 보존 (항상 False 반환)"""
+    if control.state == JobControl.CANCELLED and partial_file and os.path.exists(partial_file):
+        try:
+            os.remove(partial_file)
+        except OSError:
+            pass
+    if progress_callback:
+        progress_callback(0, control.status_text())
+    return False
+
+
+def _stop_ffmpeg(process: subprocess.Popen):
+    """ffmpeg 정상 종료 ('q' 입력으로 출력 파일 마무리), 응답 없으면 강제 종료"""
+    try:
+        process.stdin.write('q')
+        process.stdin.flush()
+    except (OSError, ValueError):
+        pass
+    try:
+        process.wait(timeout=5)
+    except subprocess.TimeoutExpired:
+        process.terminate()
+        try:
+            process.wait(timeout=3)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+
+
+def run_ffmpeg(cmd: list, control: Optional[JobControl] = None, owner=None) -> tuple:
+    """ffmpeg 실행 - 중지 요청 시 정상 종료 후 즉시 반환 (returncode, stderr 마지막 부분)"""
+    # 작업 기록이 있으면 -progress 출력에서 기록한 바이트 수를 받아 둠
+    track = isinstance(control, JobRecord)
+    if track:
+        cmd = cmd[:1] + ['-progress', 'pipe:1', '-nostats'] + cmd[1:]
+    process = subprocess.Popen(
+        cmd,
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE if track else subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        universal_newlines=True
     )
+    if owner is not None:
+        owner.current_process = process
+
+    def read_progress():
+        for line in process.stdout:
+            key, _, value = line.partition('=')
+            if key == 'total_size' and value.strip().isdigit():
+                control.progress(int(value))
+
+    # stderr 파이프가 가득 차 멈추지 않도록 별도 스레드에서 읽음
+    stderr_tail = deque(maxlen=50)
+    reader = threading.Thread(target=lambda: stderr_tail.extend(process.stderr), daemon=True)
+    reader.start()
+    if track:
+        threading.Thread(target=read_progress, daemon=True).start()
+    try:
+        while True:
+            try:
+                process.wait(timeout=0.2)
+                break
+            except subprocess.TimeoutExpired:
+                if control and control.stopped:
+                    _stop_ffmpeg(process)
+                    break
+    finally:
+        reader.join(timeout=1)
+        if owner is not None:
+            owner.current_process = None
+    return process.returncode, ''.join(stderr_tail)
+
+
+# 출력 파일 기록 - fsync 정책: 'none'(OS에 맡김) / 'file'(파일) / 'full'(파일 + 디렉터리)
+FSYNC_POLICY = os.environ.get('MTDOWN_FSYNC', 'file')
+WRITE_BUFFER_SIZE = 4 * 1024 * 1024
+
+
+def publish_unique(temp_path: str, path: str) -> str:
+    """임시 파일을 덮어쓰기 없이 최종 이름으로 공개 - 이름이 있으면 '이름 (1).확장자' 형태로
+
+    확인 후 이름 변경은 동시에 끝난 작업끼리 같은 이름을 고를 수 있으므로,
+    이미 있으면 실패하는 하드 링크(또는 O_EXCL 생성)로 이름을 원자적으로 차지함
+    """
+    base, ext = os.path.splitext(path)
+    candidate, n = path, 1
+    while True:
+        try:
+            os.link(temp_path, candidate)
+            os.remove(temp_path)
+            return candidate
+        except FileExistsError:
+            pass
+        except OSError:
+            # 하드 링크를 지원하지 않는 파일시스템 (FAT/exFAT 등): 빈 파일로 이름을 차지한 뒤 교체
+            try:
+                os.close(os.open(candidate, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+                os.replace(temp_path, candidate)
+                return candidate
+            except FileExistsError:
+                pass
+        candidate = f"{base} ({n}){ext}"
+        n += 1
+
+
+def preallocate(fp, size: Optional[int]):
+    """예상 크기만큼 디스크 공간을 미리 할당 (조각화 방지, 지원하지 않으면 무시)"""
+    if not size or not hasattr(os, 'posix_fallocate'):
+        return
+    try:
+        os.posix_fallocate(fp.fileno(), 0, size)
+    except OSError:
+        pass
+
+
+def _fsync_path(path: str):
+    """파일/디렉터리를 디스크에 기록 (디렉터리 fsync를 지원하지 않는 OS는 무시)"""
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def sync_output(path: str, policy: Optional[str] = None):
+    """fsync 정책에 따라 완성된 파일 기록"""
+    policy = policy or FSYNC_POLICY
+    if policy in ('file', 'full'):
+        _fsync_path(path)
+    if policy == 'full':
+        _fsync_path(os.path.dirname(os.path.abspath(path)))
+
+
+class AtomicOutput:
+    """최종 경로와 같은 디렉터리(같은 파일시스템)의 임시 파일에 기록 후 원자적 이름 변경
+
+    ffmpeg에는 temp_path를 출력으로 넘기고, 직접 쓸 때는 open()으로 미리 할당된 파일 사용.
+    commit() 전에 with 블록을 벗어나면 임시 파일 삭제
+    """
+
+    def __init__(self, final_path: str, size_hint: Optional[int] = None, fsync: Optional[str] = None,
+                 overwrite: bool = False):
+        self.final_path = final_path
+        self.size_hint = size_hint
+        self.fsync = fsync
+        self.overwrite = overwrite
+        directory, name = os.path.split(final_path)
+        base, ext = os.path.splitext(name)
+        # 확장자를 유지해야 ffmpeg가 출력 포맷을 알 수 있음
+        self.temp_path = os.path.join(directory, f".{base}.{uuid.uuid4().hex[:8]}.part{ext}")
+        self.committed = False
+        self._file = None
+
+    def open(self):
+        """큰 쓰기 버퍼로 임시 파일 열기 - 크기를 알면 미리 할당"""
+        self._file = open(self.temp_path, 'wb', buffering=WRITE_BUFFER_SIZE)
+        preallocate(self._file, self.size_hint)
+        return self._file
+
+    def commit(self) -> str:
+        """기록 완료 - 같은 이름이 있으면 (overwrite가 아니면) 번호를 붙여 최종 경로 반환"""
+        if self._file is not None:
+            self._file.truncate(self._file.tell())  # 예상보다 작으면 남은 할당 공간 제거
+            self._file.close()
+            self._file = None
+        policy = self.fsync or FSYNC_POLICY
+        if policy != 'none':
+            _fsync_path(self.temp_path)  # 이름 변경 전에 내용부터 기록
+        if self.overwrite:
+            os.replace(self.temp_path, self.final_path)
+        else:
+            self.final_path = publish_unique(self.temp_path, self.final_path)
+        if policy == 'full':
+            _fsync_path(os.path.dirname(os.path.abspath(self.final_path)))
+        self.committed = True
+        return self.final_path
+
+    def discard(self):
+        """commit 전이면 임시 파일 삭제"""
+        if self.committed:
+            return
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        try:
+            os.remove(self.temp_path)
+        except OSError:
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.discard()
+
+
+def probe_media(source: str, control: Optional[JobControl] = None, timeout: float = 60) -> Optional[dict]:
+    """ffprobe로 파일/URL의 포맷 및 스트림 정보 조회 (실패, 시간 초과, 중지 시 None)"""
+    cmd = [
+        get_ffprobe_path(), '-v', 'error',
+        '-print_format', 'json',
+        '-show_format', '-show_streams',
+        source
+    ]
+    try:
+        process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+    except OSError:
+        return None
+    # 원격 URL 프로브 중에도 중지 요청을 확인하여 작업 슬롯을 바로 반환
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            stdout, _ = process.communicate(timeout=0.2)
+            break
+        except subprocess.TimeoutExpired:
+            if (control and control.stopped) or time.monotonic() > deadline:
+                process.kill()
+                process.wait()
+                process.stdout.close()
+                return None
+    if process.returncode != 0:
+        return None
+    try:
+        return json.loads(stdout)
+    except ValueError:
+        return None
+
+
+# 병렬 MP3 인코딩 설정
+PARALLEL_MP3_MIN_SECONDS = 600  # 이보다 짧으면 단일 프로세스 인코딩
+MP3_CHUNK_SECONDS = 120
+MP3_PREROLL_FRAMES = 16  # 구간 앞뒤로 겹쳐 인코딩할 프레임 수 (인코더 상태 예열용)
+MP3_SAMPLE_RATES = (32000, 44100, 48000)  # MPEG1 Layer III 샘플레이트
+
+# MPEG 오디오 Layer III 비트레이트 표 (kbps) - [MPEG1, MPEG2/2.5]
+_MP3_BITRATES = [
+    [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 0],
+    [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160, 0],
+]
+_MP3_SAMPLE_RATES = {3: [44100, 48000, 32000], 2: [22050, 24000, 16000], 0: [11025, 12000, 8000]}
+
+
+def mp3_frames(data: bytes) -> list:
+    """MP3 프레임 (시작 위치, 길이) 목록 - Layer III 헤더만 해석"""
+    frames = []
+    pos = 0
+    size = len(data)
+    while pos + 4 <= size:
+        header = int.from_bytes(data[pos:pos + 4], 'big')
+        version = (header >> 19) & 3
+        bitrate_index = (header >> 12) & 15
+        rate_index = (header >> 10) & 3
+        if ((header >> 21) & 0x7FF) != 0x7FF or version == 1 or ((header >> 17) & 3) != 1 \
+                or bitrate_index in (0, 15) or rate_index == 3:
+            pos += 1  # 동기화 바이트 재탐색
+            continue
+        mpeg1 = version == 3
+        bitrate = _MP3_BITRATES[0 if mpeg1 else 1][bitrate_index] * 1000
+        sample_rate = _MP3_SAMPLE_RATES[version][rate_index]
+        padding = (header >> 9) & 1
+        length = (144 if mpeg1 else 72) * bitrate // sample_rate + padding
+        frames.append((pos, length))
+        pos += length
+    return frames
+
+
+def mp3_chunk_plan(total_frames: int, chunk_frames: int, preroll: int = MP3_PREROLL_FRAMES) -> list:
+    """PCM 구간 분할 - (읽기 시작 프레임, 읽을 프레임 수, 버릴 앞 프레임 수, 남길 프레임 수) 목록
+
+    앞뒤로 preroll 프레임씩 겹쳐 읽고, 인코딩 후 겹친 프레임을 버림 (마지막 구간은 끝까지 남김: None)
+    """
+    plan = []
+    for start in range(0, total_frames, chunk_frames):
+        end = min(start + chunk_frames, total_frames)
+        pre = min(preroll, start)
+        last = end == total_frames
+        plan.append((start - pre, end - start + pre + (0 if last else preroll), pre,
+                     None if last else end - start))
+    return plan
+
+
+def mp3_trim(data: bytes, skip: int, count: Optional[int] = None) -> bytes:
+    """인코딩한 구간에서 앞 skip 프레임을 버리고 count 프레임만 남김 (None이면 끝까지)"""
+    frames = mp3_frames(data)
+    keep = frames[skip:] if count is None else frames[skip:skip + count]
+    if not keep:
+        return b''
+    return data[keep[0][0]:keep[-1][0] + keep[-1][1]]
+
+
+def _encode_mp3_single(src: str, dst: str, bitrate: str, control=None, owner=None) -> tuple:
+    """단일 ffmpeg 프로세스로 MP3 인코딩"""
+    cmd = [
+        get_ffmpeg_path(), '-y',
+        '-i', src,
+        '-vn',
+        '-acodec', 'libmp3lame',
+        '-ab', bitrate,
+        dst
+    ]
+    return run_ffmpeg(cmd, control, owner)
+
+
+def _encode_mp3_chunk(pcm: bytes, sample_rate: int, channels: int, bitrate: str) -> bytes:
+    """PCM 구간 하나를 MP3 프레임으로 인코딩 (비트 저장소/헤더 프레임 없음)"""
+    cmd = [
+        get_ffmpeg_path(), '-v', 'error',
+        '-f', 's16le', '-ar', str(sample_rate), '-ac', str(channels), '-i', 'pipe:0',
+        '-acodec', 'libmp3lame', '-ab', bitrate,
+        '-reservoir', '0',  # 프레임이 이전 구간 데이터를 참조하지 않도록
+        '-write_xing', '0', '-id3v2_version', '0',
+        '-f', 'mp3', 'pipe:1'
+    ]
+    result = subprocess.run(cmd, input=pcm, capture_output=True)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.decode('utf-8', errors='replace')[-500:])
+    return result.stdout
+
+
+def encode_mp3(src: str, dst: str, bitrate: str = '320k', control: Optional[JobControl] = None,
+               owner=None, workers: Optional[int] = None) -> tuple:
+    """MP3 인코딩 - 긴 입력은 구간별로 나눠 여러 코어에서 병렬 인코딩 (returncode, 오류 메시지)"""
+    workers = workers or os.cpu_count() or 1
+    info = probe_media(src)
+    stream = next((st for st in (info or {}).get('streams', []) if st.get('codec_type') == 'audio'), None)
+    duration = _to_number((info or {}).get('format', {}).get('duration'))
+    sample_rate = int(stream.get('sample_rate') or 0) if stream else 0
+    channels = min(int(stream.get('channels') or 2), 2) if stream else 2
+    # 320k는 MPEG1(32kHz 이상)만 가능 - 그 외/짧은 입력은 단일 프로세스
+    if workers < 2 or not duration or duration < PARALLEL_MP3_MIN_SECONDS or sample_rate < 32000:
+        return _encode_mp3_single(src, dst, bitrate, control, owner)
+    # libmp3lame은 최대 48kHz - 고해상도 원본은 인코더가 쓰는 샘플레이트로 디코딩
+    # (인코더가 다시 리샘플하면 프레임당 원본 샘플 수가 달라져 구간 경계가 어긋남)
+    if sample_rate not in MP3_SAMPLE_RATES:
+        sample_rate = 44100 if sample_rate % 44100 == 0 else 48000
+
+    pcm_path = dst + '.pcm'
+    try:
+        # 1) 한 번만 PCM으로 디코딩
+        returncode, stderr = run_ffmpeg([
+            get_ffmpeg_path(), '-y', '-i', src, '-vn',
+            '-f', 's16le', '-acodec', 'pcm_s16le', '-ar', str(sample_rate), '-ac', str(channels),
+            pcm_path
+        ], control, owner)
+        if returncode != 0 or (control and control.stopped):
+            return returncode or 1, stderr
+
+        # 2) 프레임(1152 샘플) 경계로 구간 분할 - 앞뒤로 겹친 구간을 인코딩한 뒤
+        #    겹친 프레임을 버리면 단일 인코딩과 같은 프레임 정렬로 이어붙일 수 있음
+        frame_bytes = 1152 * channels * 2
+        total_frames = -(-os.path.getsize(pcm_path) // frame_bytes)
+        chunks = mp3_chunk_plan(total_frames, max(1, MP3_CHUNK_SECONDS * sample_rate // 1152))
+
+        def encode_chunk(chunk):
+            if control and control.stopped:
+                return None
+            read_start, read_frames, skip, count = chunk
+            with open(pcm_path, 'rb') as f:
+                f.seek(read_start * frame_bytes)
+                pcm = f.read(read_frames * frame_bytes)
+            return mp3_trim(_encode_mp3_chunk(pcm, sample_rate, channels, bitrate), skip, count)
+
+        # 3) 구간별 ffmpeg 프로세스를 코어 수만큼 동시에 실행, 순서대로 이어붙임
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            parts = list(pool.map(encode_chunk, chunks))
+        if control and control.stopped:
+            return 1, control.status_text()
+        with open(dst, 'wb', buffering=WRITE_BUFFER_SIZE) as out:
+            preallocate(out, sum(len(part) for part in parts))
+            for part in parts:
+                out.write(part)
+        return 0, ''
+    except (OSError, RuntimeError) as e:
+        return 1, str(e)
+    finally:
+        if os.path.exists(pcm_path):
+            os.remove(pcm_path)
+
+
+def extract_mp3(media_url: str, output_file: str, bitrate: str = '320k',
+                control: Optional[JobControl] = None, owner=None) -> tuple:
+    """원격 스트림의 오디오를 MP3로 추출 - 오디오를 먼저 그대로 받아 둔 뒤 encode_mp3로 인코딩"""
+    source = output_file + '.audio.mka'  # mka는 어떤 오디오 코덱이든 복사 가능
+    try:
+        returncode, stderr = run_ffmpeg([
+            get_ffmpeg_path(), '-y',
+            '-i', media_url,
+            '-vn', '-c:a', 'copy',
+            source
+        ], control, owner)
+        if returncode != 0 or (control and control.stopped):
+            return returncode or 1, stderr
+        if control:
+            control.set_stage(Stage.PROCESSING)
+        return encode_mp3(source, output_file, bitrate, control, owner)
+    finally:
+        if os.path.exists(source):
+            os.remove(source)
+
+
+# 음원 컨테이너: (확장자, 복사 가능한 코덱, 재인코딩 코덱, 재인코딩 비트레이트)
+AUDIO_CONTAINERS = {
+    'mp3': ('mp3', {'mp3'}, 'libmp3lame', '320k'),
+    'm4a': ('m4a', {'aac', 'alac'}, 'aac', '256k'),
+    'opus': ('opus', {'opus'}, 'libopus', '160k'),
+    'ogg': ('ogg', {'vorbis', 'opus'}, 'libvorbis', '192k'),
+}
+# 'auto': 원본 코덱을 그대로 담을 수 있는 컨테이너 (없으면 mp3로 재인코딩)
+AUTO_AUDIO_CONTAINERS = {'aac': 'm4a', 'alac': 'm4a', 'opus': 'opus', 'mp3': 'mp3', 'vorbis': 'ogg'}
+# 영상 컨테이너: (확장자, 복사 가능한 영상 코덱, 영상 재인코딩, 복사 가능한 음성 코덱, 음성 재인코딩)
+VIDEO_CONTAINERS = {
+    'mp4': ('mp4', {'h264', 'hevc', 'av1'}, 'libx264', {'aac', 'mp3', 'alac'}, 'aac'),
+    'mkv': ('mkv', None, None, None, None),  # 모든 코덱 복사 가능
+}
+
+_CODEC_ALIASES = (('mp4a', 'aac'), ('avc', 'h264'), ('hev', 'hevc'), ('hvc', 'hevc'),
+                  ('av01', 'av1'), ('vp09', 'vp9'))
+
+# 원본 프로브 결과 캐시 (사이트, 미디어 ID) -> ffprobe 결과
+PROBE_CACHE = ResolveCache(ttl=3600, maxsize=1024)
+
+
+def normalize_codec(name: Optional[str]) -> Optional[str]:
+    """ffprobe/yt-dlp 코덱 표기를 공통 이름으로 (mp4a.40.2 -> aac, avc1.64 -> h264)"""
+    if not name or name == 'none':
+        return None
+    name = name.lower()
+    for prefix, codec in _CODEC_ALIASES:
+        if name.startswith(prefix):
+            return codec
+    return name.split('.')[0]
+
+
+def probe_source(key, source: str, control: Optional[JobControl] = None) -> Optional[dict]:
+    """미디어 ID별로 한 번만 원본 프로브 (결과 캐시, 원격 URL이므로 제한 시간을 짧게)"""
+    return PROBE_CACHE.get(key, lambda: probe_media(source, control, timeout=15), control)
+
+
+def source_codecs(probe: Optional[dict], format_hint: str = '') -> dict:
+    """프로브 결과에서 영상/음성 코덱 및 원본 포맷 추출 (알 수 없으면 None)"""
+    streams = (probe or {}).get('streams', [])
+    video = next((st.get('codec_name') for st in streams if st.get('codec_type') == 'video'
+                  and not (st.get('disposition') or {}).get('attached_pic')), None)
+    audio = next((st.get('codec_name') for st in streams if st.get('codec_type') == 'audio'), None)
+    return {
+        'video': normalize_codec(video),
+        'audio': normalize_codec(audio),
+        'format': (probe or {}).get('format', {}).get('format_name') or format_hint,
+    }
+
+
+def plan_pipeline(codecs: dict, kind: str, container: str) -> dict:
+    """요청한 출력에 필요한 가장 가벼운 처리 결정 - 가능하면 스트림 복사, 필요할 때만 재인코딩"""
+    audio = codecs.get('audio')
+    video = codecs.get('video')
+    if kind == 'audio':
+        if container == 'auto':
+            container = AUTO_AUDIO_CONTAINERS.get(audio, 'mp3')
+        ext, copyable, encoder, bitrate = AUDIO_CONTAINERS[container]
+        audio_copy = audio in copyable
+        plan = {
+            'container': container,
+            'ext': ext,
+            'video': None,
+            'audio': 'copy' if audio_copy else encoder,
+            'audio_bitrate': None if audio_copy else bitrate,
+        }
+    else:
+        ext, video_copyable, video_encoder, audio_copyable, audio_encoder = VIDEO_CONTAINERS[container]
+        # 코덱을 알 수 없으면 기존 동작(복사) 유지
+        video_copy = video_copyable is None or video is None or video in video_copyable
+        audio_copy = audio_copyable is None or audio is None or audio in audio_copyable
+        plan = {
+            'container': container,
+            'ext': ext,
+            'video': 'copy' if video_copy else video_encoder,
+            'audio': 'copy' if audio_copy else audio_encoder,
+            'audio_bitrate': None if audio_copy else '192k',
+        }
+    # HLS/MPEG-TS의 ADTS AAC를 mp4/m4a에 복사할 때 필요
+    source_format = codecs.get('format') or ''
+    if plan['audio'] == 'copy' and plan['ext'] in ('mp4', 'm4a') and audio in ('aac', None) \
+            and ('hls' in source_format or 'mpegts' in source_format):
+        plan['bsf'] = 'aac_adtstoasc'
+    return plan
+
+
+def ffmpeg_output_args(plan: dict) -> list:
+    """plan_pipeline 결과를 ffmpeg 출력 옵션으로"""
+    args = []
+    if plan['video'] is None:
+        args.append('-vn')
+    elif plan['video'] == 'copy':
+        args += ['-c:v', 'copy']
+    else:
+        args += ['-c:v', plan['video'], '-preset', 'veryfast', '-crf', '20']
+    args += ['-c:a', plan['audio']]
+    if plan.get('audio_bitrate'):
+        args += ['-b:a', plan['audio_bitrate']]
+    if plan.get('bsf'):
+        args += ['-bsf:a', plan['bsf']]
+    return args
+
+
+def extract_audio(media_url: str, output_file: str, plan: dict,
+                  control: Optional[JobControl] = None, owner=None) -> tuple:
+    """원격 스트림에서 plan대로 음원 추출 (MP3 재인코딩은 병렬 인코더 사용)"""
+    if plan['audio'] == 'libmp3lame':
+        return extract_mp3(media_url, output_file, plan['audio_bitrate'], control, owner)
+    cmd = [get_ffmpeg_path(), '-y', '-i', media_url] + ffmpeg_output_args(plan) + [output_file]
+    return run_ffmpeg(cmd, control, owner)
+
+
+def convert_audio_file(source: str, codecs: dict, container: str,
+                       control: Optional[JobControl] = None, owner=None) -> tuple:
+    """받은 음원 파일을 요청한 컨테이너로 변환 - 그대로 쓸 수 있으면 아무것도 하지 않음
+    (returncode, 오류 메시지, 결과 파일 - 실패/중지 시 None)"""
+    plan = plan_pipeline(codecs, 'audio', container)
+    base, ext = os.path.splitext(source)
+    if plan['audio'] == 'copy' and ext.lstrip('.').lower() == plan['ext']:
+        sync_output(source)
+        return 0, '', source
+    with AtomicOutput(f"{base}.{plan['ext']}") as output:
+        if plan['audio'] == 'libmp3lame':
+            returncode, stderr = encode_mp3(source, output.temp_path, plan['audio_bitrate'], control, owner)
+        else:
+            cmd = [get_ffmpeg_path(), '-y', '-i', source] + ffmpeg_output_args(plan) + [output.temp_path]
+            returncode, stderr = run_ffmpeg(cmd, control, owner)
+        if returncode != 0 or (control and control.stopped):
+            return returncode, stderr, None
+        target = output.commit()
+    os.remove(source)
+    return returncode, stderr, target
+
+
+BROWSER_USER_AGENT = (
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
+    '(KHTML, like Gecko) Chrome/124.0 Safari/537.36'
+)
+
+
+# 사이트별 브라우저 저장 상태 (쿠키/localStorage) - 동의/리다이렉트 과정을 매 추출마다 반복하지 않음
+BROWSER_STATE_DIR = os.path.join(os.path.expanduser('~'), '.mtdown', 'browser')
+BROWSER_STATE_TTL = 12 * 3600
+
+
+class BrowserSessionStore:
+    """사이트별 Playwright storage_state 파일 관리 - 프로필(워커)마다 별도 디렉터리"""
+
+    def __init__(self, profile: str = 'default', root: str = BROWSER_STATE_DIR, ttl: float = BROWSER_STATE_TTL):
+        self.profile = profile
+        self.root = root
+        self.ttl = ttl
+
+    def path(self, site: str) -> str:
+        return os.path.join(self.root, self.profile, f"{site}.json")
+
+    def load(self, site: str) -> Optional[str]:
+        """유효한 저장 상태 파일 경로 (없거나 만료되면 None - 새 세션으로 시작)"""
+        path = self.path(site)
+        try:
+            age = time.time() - os.path.getmtime(path)
+        except OSError:
+            return None
+        if age > self.ttl:
+            self.discard(site)
+            return None
+        return path
+
+    def save(self, site: str, context):
+        """추출 성공 후 브라우저 컨텍스트의 저장 상태 기록 (임시 파일 후 이름 변경)"""
+        try:
+            state = json.dumps(context.storage_state()).encode('utf-8')
+            os.makedirs(os.path.join(self.root, self.profile), exist_ok=True)
+            with AtomicOutput(self.path(site), fsync='none', overwrite=True) as output:
+                output.open().write(state)
+                os.chmod(output.temp_path, 0o600)  # 로그인/세션 쿠키 포함
+                output.commit()
+        except Exception as e:
+            print(f"브라우저 상태 저장 실패: {e}")
+
+    def discard(self, site: str):
+        """저장 상태 삭제 (만료 또는 저장된 세션으로 추출 실패)"""
+        try:
+            os.remove(self.path(site))
+        except OSError:
+            pass
+
+
+def fetch_page(url: str, timeout: float = 10) -> str:
+    """브라우저 없이 HTTP로 페이지 HTML 가져오기"""
+    context = ssl.create_default_context(cafile=certifi.where()) if HAS_CERTIFI else None
+    request = urllib.request.Request(url, headers={
+        'User-Agent': BROWSER_USER_AGENT,
+        'Accept-Language': 'ko-KR,ko;q=0.9,en;q=0.8',
+    })
+    with urllib.request.urlopen(request, timeout=timeout, context=context) as response:
+        charset = response.headers.get_content_charset() or 'utf-8'
+        return response.read().decode(charset, errors='replace')
+
+
+class _MetaTagParser(HTMLParser):
+    """<meta property/name=... content=...> 및 <title> 수집"""
 
     def __init__(self):
-        self.current_process = None
+        super().__init__()
+        self.meta = {}
+        self._in_title = False
 
-    @staticmethod
-    def validate_url(url: str) -> bool:
-        """YouTube/Instagram URL 유효성 검사"""
-        return bool(YouTubeDownloader.YOUTUBE_REGEX.match(url) or
-                    YouTubeDownloader.INSTAGRAM_REGEX.match(url))
+    def handle_starttag(self, tag, attrs):
+        if tag == 'meta':
+            attrs = dict(attrs)
+            key = attrs.get('property') or attrs.get('name')
+            if key and attrs.get('content') is not None:
+                self.meta.setdefault(key.lower(), attrs['content'])
+        elif tag == 'title':
+            self._in_title = True
 
-    def download_video(
+    def handle_endtag(self, tag):
+        if tag == 'title':
+            self._in_title = False
+
+    def handle_data(self, data):
+        if self._in_title and data.strip():
+            self.meta.setdefault('title', data.strip())
+
+
+def parse_meta_tags(html: str) -> dict:
+    """HTML에서 og:/twitter: 등 메타 태그 추출"""
+    parser = _MetaTagParser()
+    try:
+        parser.feed(html)
+    except Exception:
+        pass
+    return parser.meta
+
+
+MEDIA_URL_REGEX = re.compile(r'https?:(?:\\?/){2}(?:[^"\'\s<>\\]|\\/|\\u0026)+')
+
+
+def find_media_urls(html: str, predicate: Callable[[str], bool]) -> list:
+    """HTML/내장 JSON에서 조건에 맞는 URL 추출 (JSON 이스케이프 해제, 순서 유지)"""
+    found = []
+    for raw in MEDIA_URL_REGEX.findall(html):
+        media_url = raw.replace('\\/', '/').replace('\\u0026', '&').replace('&amp;', '&')
+        if predicate(media_url) and media_url not in found:
+            found.append(media_url)
+    return found
+
+
+class ExtractStats:
+    """사이트별 추출 단계(http/browser/failed) 성공 횟수"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = {}
+
+    def record(self, site: str, tier: str):
+        with self._lock:
+            counts = self._counts.setdefault(site, {})
+            counts[tier] = counts.get(tier, 0) + 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {site: dict(counts) for site, counts in self._counts.items()}
+
+
+EXTRACT_STATS = ExtractStats()
+
+
+def _to_number(value):
+    """메타 태그 문자열을 숫자로 변환 (실패 시 None)"""
+    try:
+        return float(value) if value not in (None, '') else None
+    except ValueError:
+        return None
+
+
+def probe_page(url: str, site: str, media_id: Optional[str]) -> dict:
+    """페이지 HTML의 메타 태그만으로 카탈로그 레코드 생성 (브라우저/미디어 다운로드 없음)"""
+    meta = parse_meta_tags(fetch_page(url))
+    video_url = meta.get('og:video:secure_url') or meta.get('og:video') or meta.get('og:video:url')
+    formats = []
+    if video_url:
+        formats.append({
+            'format_id': 'og',
+            'ext': meta.get('og:video:type', '').split('/')[-1] or None,
+            'height': _to_number(meta.get('og:video:height')),
+            'url': video_url,
+        })
+    return {
+        'url': url,
+        'site': site,
+        'id': media_id,
+        'title': meta.get('og:title') or meta.get('title'),
+        'duration': _to_number(meta.get('og:video:duration') or meta.get('video:duration')),
+        'thumbnail': meta.get('og:image'),
+        'format_count': len(formats),
+        'formats': formats,
+    }
+
+
+CATALOG_FIELDS = ['url', 'site', 'id', 'title', 'duration', 'thumbnail', 'format_count', 'formats', 'error']
+
+
+def write_catalog(records: Iterable[dict], fp, fmt: str = 'jsonl') -> int:
+    """카탈로그 레코드를 JSON Lines 또는 CSV로 스트리밍 기록 - 기록한 건수 반환"""
+    count = 0
+    if fmt == 'csv':
+        # 열 순서/타입 고정 (Parquet 변환 시 스키마가 흔들리지 않도록)
+        writer = csv.DictWriter(fp, fieldnames=CATALOG_FIELDS, extrasaction='ignore')
+        writer.writeheader()
+        for record in records:
+            row = dict(record)
+            row['formats'] = json.dumps(record.get('formats') or [], ensure_ascii=False)
+            writer.writerow(row)
+            count += 1
+    else:
+        for record in records:
+            fp.write(json.dumps(record, ensure_ascii=False) + '\n')
+            count += 1
+    fp.flush()
+    return count
+
+
+class FormatPolicy:
+    """영상 포맷 선택 정책 (최대 해상도/용량, 선호 코덱, 단일 스트림 선호)"""
+
+    def __init__(
         self,
-        url: str,
-        output_path: str,
-        progress_callback: Optional[Callable[[float, str], None]] = None
-    ) -> bool:
-        """영상 다운로드 (최고 화질)"""
+        max_height: Optional[int] = 1080,
+        max_filesize: Optional[int] = None,
+        preferred_vcodec: Optional[str] = 'avc1',
+        prefer_premuxed: bool = True
+    ):
+        self.max_height = max_height
+        self.max_filesize = max_filesize  # bytes
+        self.preferred_vcodec = preferred_vcodec  # avc1(H.264)은 디코딩 부담이 가장 적음
+        self.prefer_premuxed = prefer_premuxed
+
+    def fallback_spec(self) -> str:
+        """포맷 목록이 없을 때 사용할 yt-dlp 포맷 문자열"""
+        h = f'[height<={self.max_height}]' if self.max_height else ''
+        return f'bestvideo{h}[ext=mp4]+bestaudio[ext=m4a]/best{h}[ext=mp4]/best{h}/best'
+
+
+def _estimate_size(f: dict, duration) -> Optional[int]:
+    """포맷의 예상 파일 크기 (bytes)"""
+    size = f.get('filesize') or f.get('filesize_approx')
+    if not size and duration:
+        rate = f.get('tbr') or (f.get('vbr') or 0) + (f.get('abr') or 0)
+        if rate:
+            size = int(rate * 125 * duration)  # kbps -> bytes/s
+    return size
+
+
+def select_format(info: dict, policy: FormatPolicy) -> Optional[dict]:
+    """정책에 맞는 포맷 선택 - 선택 결과(포맷 ID, 해상도, 코덱, 예상 크기, 사유) 반환"""
+    formats = [f for f in info.get('formats') or []
+               if f.get('format_id') and f.get('protocol') != 'mhtml']
+    if not formats:
+        return None
+    duration = info.get('duration')
+
+    def has_video(f):
+        return f.get('vcodec') != 'none'
+
+    def has_audio(f):
+        return f.get('acodec') != 'none'
+
+    def video_key(f):
+        codec_match = bool(policy.preferred_vcodec and
+                           (f.get('vcodec') or '').startswith(policy.preferred_vcodec))
+        return (f.get('height') or 0, codec_match, f.get('ext') == 'mp4', f.get('tbr') or 0)
+
+    def within_height(f):
+        return not policy.max_height or (f.get('height') or 0) <= policy.max_height
+
+    videos = [f for f in formats if has_video(f) and not has_audio(f) and within_height(f)]
+    audios = [f for f in formats if has_audio(f) and not has_video(f)]
+    muxed = [f for f in formats if has_video(f) and has_audio(f) and within_height(f)]
+
+    candidates = []  # (정렬 키, 선택 결과, 최소 예상 크기 - 크기를 아는 스트림의 합)
+    best_audio = max(audios, key=lambda f: (f.get('ext') == 'm4a', f.get('abr') or f.get('tbr') or 0),
+                     default=None)
+    if best_audio:
+        audio_size = _estimate_size(best_audio, duration)
+        for v in videos:
+            video_size = _estimate_size(v, duration)
+            size = video_size + audio_size if video_size and audio_size else None
+            candidates.append((video_key(v), {
+                'format': f"{v['format_id']}+{best_audio['format_id']}",
+                'premuxed': False,
+                'height': v.get('height'),
+                'vcodec': v.get('vcodec'),
+                'acodec': best_audio.get('acodec'),
+                'filesize_estimate': size,
+            }, (video_size or 0) + (audio_size or 0)))
+    for m in muxed:
+        size = _estimate_size(m, duration)
+        candidates.append((video_key(m), {
+            'format': m['format_id'],
+            'premuxed': True,
+            'height': m.get('height'),
+            'vcodec': m.get('vcodec'),
+            'acodec': m.get('acodec'),
+            'filesize_estimate': size,
+        }, size or 0))
+    if not candidates:
+        return None
 
-        def progress_hook(d):
-            if d['status'] == 'downloading':
-                total = d.get('total_bytes') or d.get('total_bytes_estimate', 0)
-                downloaded = d.get('downloaded_bytes', 0)
-                if total > 0:
-                    percent = (downloaded / total) * 100
-                    speed = d.get('speed', 0)
-                    speed_str = f"{speed / 1024 / 1024:.1f} MB/s" if speed else "계산 중..."
-                    if progress_callback:
-                        progress_callback(percent, f"다운로드 중... {percent:.1f}% ({speed_str})")
-            elif d['status'] == 'finished':
-                if progress_callback:
-                    progress_callback(100, "다운로드 완료! 처리 중...")
+    # 용량 제한 적용 - 크기를 아는 스트림만으로 이미 넘으면 제외 (모두 모르면 통과)
+    allowed = [c for c in candidates if not policy.max_filesize or c[2] <= policy.max_filesize]
+    if not allowed:
+        decision = min(candidates, key=lambda c: c[2])[1]
+        decision['reason'] = 'size cap unmet: smallest available'
+        return decision
+
+    best_pair = max((c for c in allowed if not c[1]['premuxed']), key=lambda c: c[0], default=None)
+    best_muxed = max((c for c in allowed if c[1]['premuxed']), key=lambda c: c[0], default=None)
+
+    # 단일 스트림이 같은 해상도를 만족하면 병합(ffmpeg) 없이 받음
+    if best_muxed and (not best_pair or (policy.prefer_premuxed and best_muxed[0][0] >= best_pair[0][0])):
+        decision = best_muxed[1]
+        decision['reason'] = 'premuxed stream meets cap'
+    else:
+        decision = best_pair[1]
+        decision['reason'] = 'best video+audio within cap'
+    return decision
+
+
+class Route(NamedTuple):
+    """URL 라우팅 결과"""
+    site: str
+    handler: object  # 다운로더 인스턴스
+    media_id: Optional[str]  # 사이트별 고유 ID (YouTube 11자리 ID, Instagram shortcode 등)
+    url: str  # 정규화된 URL (중복 판별/표시용)
+    source_url: str  # 입력된 원본 URL (재생목록/시작 시각 등 파라미터 보존, 다운로드에 사용)
+
+
+# 등록된 다운로더 클래스 (SITES 패턴을 가진 클래스)
+SITE_REGISTRY = []
+
+
+def register_site(cls):
+    """다운로더 클래스를 사이트 라우터에 등록하는 데코레이터"""
+    SITE_REGISTRY.append(cls)
+    return cls
+
+
+class SiteRouter:
+    """사이트 라우터 - 모든 사이트 패턴을 하나의 정규식으로 합쳐 한 번의 매칭으로 판별"""
+
+    GROUP_NAME_REGEX = re.compile(r'\(\?P<(\w+)>')
 
+    def __init__(self):
+        self._sites = []  # (사이트 이름, 핸들러, 그룹 이름 목록, URL 템플릿)
+        self._regex = None
+
+    def register(self, site: str, pattern: str, handler, template: Optional[str] = None):
+        """사이트 패턴 등록 - pattern의 (?P<id>...)가 미디어 ID, template으로 URL 정규화"""
+        self._sites.append((site, handler, self.GROUP_NAME_REGEX.findall(pattern), pattern, template))
+        self._regex = None
+
+    def register_handler(self, handler):
+        """핸들러 클래스의 SITES 패턴을 모두 등록"""
+        for site, pattern, template in handler.SITES:
+            self.register(site, pattern, handler, template)
+
+    def _compile(self):
+        """등록된 패턴을 이름 붙은 그룹의 대안(|)으로 결합"""
+        parts = []
+        for i, (_, _, names, pattern, _) in enumerate(self._sites):
+            pattern = self.GROUP_NAME_REGEX.sub(lambda m: f'(?P<s{i}_{m.group(1)}>', pattern)
+            parts.append(f'(?P<s{i}>{pattern})')
+        self._regex = re.compile('|'.join(parts))
+
+    def route(self, url: str) -> Optional[Route]:
+        """URL을 한 번 매칭하여 핸들러, 미디어 ID, 정규화 URL 반환"""
+        if self._regex is None:
+            self._compile()
+        match = self._regex.match(url)
+        if not match:
+            return None
+        # 가장 바깥 그룹이 마지막에 닫히므로 lastgroup이 매칭된 사이트
+        i = int(match.lastgroup[1:])
+        site, handler, names, _, template = self._sites[i]
+        groups = {name: match.group(f's{i}_{name}') or '' for name in names}
+        normalized = template.format(**groups) if template else url
+        return Route(site, handler, groups.get('id') or None, normalized, url)
+
+
+@register_site
+class YouTubeDownloader:
+    """YouTube/Instagram 영상/음원 다운로드 클래스 (yt-dlp 지원 사이트)"""
+
+    # (사이트 이름, 패턴, 정규화 URL 템플릿)
+    SITES = [
+        ('youtube',
+         r'(?:https?://)?(?:www\.|m\.)?(?:youtube|youtu|youtube-nocookie)\.(?:com|be)/'
+         r'(?:watch\?v=|embed/|v/|\S*?[?&]v=|shorts/)?(?P<id>(?!videoseries)[\w-]{11})(?![\w-])',
+         'https://www.youtube.com/watch?v={id}'),
+        # 채널/재생목록 등 영상 ID가 없는 YouTube URL도 허용 (ID 없음)
+        ('youtube', r'(?:https?://)?(?:www\.|m\.)?(?:youtube|youtu|youtube-nocookie)\.(?:com|be)(?:/\S*)?', None),
+        ('instagram',
+         r'(?:https?://)?(?:www\.)?instagram\.com/(?:p|reel|reels|tv)/(?P<id>[\w-]+)',
+         'https://www.instagram.com/p/{id}/'),
+    ]
+
+    def __init__(self, format_policy: Optional[FormatPolicy] = None):
+        self.current_process = None
+        self._resolved = ResolveCache()
+        self.format_policy = format_policy or FormatPolicy()
+
+    @staticmethod
+    def _base_opts() -> dict:
+        """공통 yt-dlp 옵션"""
         ydl_opts = {
-            'format': 'bestvideo[ext=mp4]+bestaudio[ext=m4a]/best[ext=mp4]/best',
-            'outtmpl': os.path.join(output_path, '%(title)s.%(ext)s'),
-            'progress_hooks': [progress_hook],
-            'merge_output_format': 'mp4',
             'nocheckcertificate': True,
             'no_check_certificate': True,
+            'buffersize': 1024 * 1024,  # 초기 읽기/쓰기 블록 크기 (이후 속도에 맞게 자동 조정)
         }
         # 번들된 ffmpeg가 있으면 경로 지정
         ffmpeg_loc = get_ffmpeg_location()
@@ -121,27 +1252,102 @@ class YouTubeDownloader:
                 os.environ['REQUESTS_CA_BUNDLE'] = certifi.where()
             except:
                 pass
+        return ydl_opts
+
+    def resolve(self, url: str, control: Optional[JobControl] = None) -> Optional[dict]:
+        """메타데이터/포맷 정보 추출 (다운로드 없음, 결과는 캐시됨)"""
+        def extract():
+            opts = self._base_opts()
+            opts['quiet'] = True
+            with yt_dlp.YoutubeDL(opts) as ydl:
+                # process=False: 포맷 선택 전의 원본 정보 - 다운로드 시 그대로 재사용
+                return ydl.extract_info(url, download=False, process=False)
+        return self._resolved.get(url, extract, control)
+
+    def probe(self, url: str) -> dict:
+        """메타데이터만 추출하여 카탈로그 레코드 반환 (미디어 다운로드 없음)"""
+        info = self.resolve(url)
+        duration = info.get('duration')
+        formats = [{
+            'format_id': f.get('format_id'),
+            'ext': f.get('ext'),
+            'height': f.get('height'),
+            'vcodec': f.get('vcodec'),
+            'acodec': f.get('acodec'),
+            'filesize': _estimate_size(f, duration),
+        } for f in info.get('formats') or [] if f.get('protocol') != 'mhtml']
+        thumbnails = info.get('thumbnails') or []
+        return {
+            'url': url,
+            'site': (info.get('extractor_key') or 'youtube').lower(),
+            'id': info.get('id'),
+            'title': info.get('title'),
+            'duration': duration,
+            'thumbnail': info.get('thumbnail') or (thumbnails[-1].get('url') if thumbnails else None),
+            'format_count': len(formats),
+            'formats': formats,
+        }
 
+    def _run(self, url: str, ydl_opts: dict, progress_callback=None, prepare=None, control=None,
+             finish=None) -> bool:
+        """미리 추출된 정보가 있으면 재사용하여 다운로드 실행 (finish: 다운로드 후 후처리)"""
+        partial = {}
+
+        def control_hook(d):
+            if d['status'] == 'downloading':
+                partial['file'] = d.get('tmpfilename')
+                if control:
+                    control.progress(d.get('downloaded_bytes') or 0,
+                                     d.get('total_bytes') or d.get('total_bytes_estimate'), d.get('speed'))
+            elif d['status'] == 'started' and control:
+                control.set_stage(Stage.PROCESSING)  # 후처리(병합 등) 시작
+            # 다음 훅 호출 시점에 중단 (.part 파일은 yt-dlp가 이어받기에 사용)
+            if control and control.stopped:
+                raise yt_dlp.utils.DownloadCancelled()
+
+        ydl_opts['progress_hooks'] = [control_hook] + ydl_opts.get('progress_hooks', [])
+        ydl_opts['postprocessor_hooks'] = [control_hook]
         try:
+            if control:
+                control.set_stage(Stage.RESOLVING)
+            info = self.resolve(url, control)
+            if control and control.stopped:
+                return stop_job(control, None, progress_callback)
+            if prepare:
+                prepare(info)
+            if control:
+                control.set_stage(Stage.DOWNLOADING)
             with yt_dlp.YoutubeDL(ydl_opts) as ydl:
                 self.current_process = ydl
-                ydl.download([url])
+                # 캐시된 정보는 영상/음원 다운로드에서 공유하므로 복사본 사용
+                result = ydl.process_ie_result(copy.deepcopy(info), download=True)
+            if finish:
+                return finish(result)
             return True
         except Exception as e:
+            if control and control.stopped:
+                return stop_job(control, partial.get('file'), progress_callback)
+            if control:
+                control.fail(ErrorCode.DOWNLOAD)
             print(f"다운로드 실패: {e}")
+            # 만료된 스트림 URL일 수 있으므로 다음 시도에서 다시 추출
+            self._resolved.discard(url)
             if progress_callback:
                 progress_callback(0, f"오류: {str(e)}")
             return False
         finally:
             self.current_process = None
 
-    def download_audio(
+    def download_video(
         self,
         url: str,
         output_path: str,
-        progress_callback: Optional[Callable[[float, str], None]] = None
+        progress_callback: Optional[Callable[[float, str], None]] = None,
+        metadata: Optional[dict] = None,
+        control: Optional[JobControl] = None,
+        container: str = 'mp4'
     ) -> bool:
-        """음원 추출 (MP3)"""
+        """영상 다운로드 (포맷 정책에 따라 선택, 선택 결과는 metadata['format']에 기록)"""
 
         def progress_hook(d):
             if d['status'] == 'downloading':
@@ -155,60 +1361,187 @@ class YouTubeDownloader:
                         progress_callback(percent, f"다운로드 중... {percent:.1f}% ({speed_str})")
             elif d['status'] == 'finished':
                 if progress_callback:
-                    progress_callback(100, "MP3 변환 중...")
+                    progress_callback(100, "다운로드 완료! 처리 중...")
 
-        ydl_opts = {
-            'format': 'bestaudio/best',
+        ydl_opts = self._base_opts()
+        ydl_opts.update({
+            'format': self.format_policy.fallback_spec(),
             'outtmpl': os.path.join(output_path, '%(title)s.%(ext)s'),
-            'progress_hooks': [progress_hook],
-            'postprocessors': [{
-                'key': 'FFmpegExtractAudio',
-                'preferredcodec': 'mp3',
-                'preferredquality': '320',
-            }],
-            'nocheckcertificate': True,
-            'no_check_certificate': True,
-        }
-        # 번들된 ffmpeg가 있으면 경로 지정
-        ffmpeg_loc = get_ffmpeg_location()
-        if ffmpeg_loc:
-            ydl_opts['ffmpeg_location'] = ffmpeg_loc
-        # SSL 인증서 경로 설정 (패키징 앱용)
-        if HAS_CERTIFI:
-            try:
-                os.environ['SSL_CERT_FILE'] = certifi.where()
-                os.environ['REQUESTS_CA_BUNDLE'] = certifi.where()
-            except:
-                pass
+            # 표시용 문자열은 화면에 보여줄 때만 생성 (대량 작업은 control에 숫자만 기록)
+            'progress_hooks': [progress_hook] if progress_callback else [],
+            'merge_output_format': container,  # 병합은 항상 스트림 복사
+            # 단일(premuxed) 스트림/대체 포맷도 선택한 컨테이너로 (이미 같으면 건너뜀)
+            'postprocessors': [{'key': 'FFmpegVideoRemuxer', 'preferedformat': container}],
+        })
+
+        def choose_format(info):
+            decision = select_format(info, self.format_policy)
+            if decision:
+                # 원시 목록의 포맷은 yt-dlp가 나중에 제외할 수 있음 (DRM 등) - 정책 포맷 문자열로 대체
+                ydl_opts['format'] = f"{decision['format']}/{self.format_policy.fallback_spec()}"
+            if metadata is not None:
+                metadata['format'] = decision or {'format': ydl_opts['format'], 'reason': 'fallback spec'}
+                # YouTube/Instagram은 재인코딩 없이 병합 또는 리먹스만 수행
+                source_ext = None
+                if decision and decision['premuxed']:
+                    source_ext = next((f.get('ext') for f in info.get('formats') or []
+                                       if f.get('format_id') == decision['format']), None)
+                metadata['pipeline'] = {
+                    'container': container,
+                    'ext': container,
+                    'video': 'copy',
+                    'audio': 'copy',
+                    'step': 'merge' if decision and not decision['premuxed']
+                    else 'none' if source_ext == container else 'remux',
+                }
+
+        def finish(result):
+            # yt-dlp는 .part 파일에 받은 뒤 이름을 바꾸므로 완성된 파일만 디스크에 기록
+            for entry in result.get('entries') or [result]:
+                for download in (entry or {}).get('requested_downloads') or []:
+                    if download.get('filepath') and os.path.exists(download['filepath']):
+                        sync_output(download['filepath'])
+                        if metadata is not None:
+                            metadata['filepath'] = download['filepath']
+            return True
 
-        try:
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                self.current_process = ydl
-                ydl.download([url])
+        return self._run(url, ydl_opts, progress_callback, prepare=choose_format, control=control,
+                         finish=finish)
+
+    def download_audio(
+        self,
+        url: str,
+        output_path: str,
+        progress_callback: Optional[Callable[[float, str], None]] = None,
+        metadata: Optional[dict] = None,
+        control: Optional[JobControl] = None,
+        container: str = 'mp3'
+    ) -> bool:
+        """음원 추출 (container: mp3/m4a/opus 또는 원본 코덱 유지 auto)"""
+
+        def progress_hook(d):
+            if d['status'] == 'downloading':
+                total = d.get('total_bytes') or d.get('total_bytes_estimate', 0)
+                downloaded = d.get('downloaded_bytes', 0)
+                if total > 0:
+                    percent = (downloaded / total) * 100
+                    speed = d.get('speed', 0)
+                    speed_str = f"{speed / 1024 / 1024:.1f} MB/s" if speed else "계산 중..."
+                    if progress_callback:
+                        progress_callback(percent, f"다운로드 중... {percent:.1f}% ({speed_str})")
+            elif d['status'] == 'finished':
+                if progress_callback:
+                    progress_callback(100, "음원 변환 중...")
+
+        # 요청한 컨테이너에 그대로 담을 수 있는 음원을 우선 선택 (재인코딩 회피)
+        audio_formats = {
+            'm4a': 'bestaudio[ext=m4a]/bestaudio/best',
+            'opus': 'bestaudio[acodec=opus]/bestaudio/best',
+        }
+        ydl_opts = self._base_opts()
+        ydl_opts.update({
+            'format': audio_formats.get(container, 'bestaudio/best'),
+            'outtmpl': os.path.join(output_path, '%(title)s.%(ext)s'),
+            # 표시용 문자열은 화면에 보여줄 때만 생성 (대량 작업은 control에 숫자만 기록)
+            'progress_hooks': [progress_hook] if progress_callback else [],
+        })
+
+        def convert(result):
+            # 받은 포맷의 코덱(yt-dlp 정보)으로 복사/재인코딩 결정 - MP3는 병렬 인코더 사용
+            for entry in result.get('entries') or [result]:
+                for download in (entry or {}).get('requested_downloads') or []:
+                    source = download.get('filepath')
+                    if not source:
+                        continue
+                    codecs = {'audio': normalize_codec(download.get('acodec')), 'format': download.get('ext')}
+                    if metadata is not None:
+                        metadata['pipeline'] = plan_pipeline(codecs, 'audio', container)
+                    if control:
+                        control.set_stage(Stage.PROCESSING)
+                    returncode, stderr, target = convert_audio_file(source, codecs, container,
+                                                                    control=control, owner=self)
+                    if control and control.stopped:
+                        return stop_job(control, None, progress_callback)
+                    if returncode != 0:
+                        print(f"FFmpeg 오류: {stderr}")
+                        if control:
+                            control.fail(ErrorCode.FFMPEG)
+                        if progress_callback:
+                            progress_callback(0, "음원 변환 실패")
+                        return False
+                    if metadata is not None:
+                        metadata['filepath'] = target
             return True
-        except Exception as e:
-            print(f"다운로드 실패: {e}")
-            if progress_callback:
-                progress_callback(0, f"오류: {str(e)}")
-            return False
-        finally:
-            self.current_process = None
 
+        return self._run(url, ydl_opts, progress_callback, control=control, finish=convert)
 
+
+@register_site
 class AikiveDownloader:
     """Aikive.com 영상 다운로드 클래스"""
 
-    AIKIVE_REGEX = re.compile(r'https?://aikive\.com/list-video/(shorts/)?(\d+)')
+    SITES = [
+        ('aikive',
+         r'https?://(?:www\.)?aikive\.com/list-video/(?P<shorts>shorts/)?(?P<id>\d+)',
+         'https://aikive.com/list-video/{shorts}{id}'),
+    ]
 
     def __init__(self):
         self.current_process = None
+        self._resolved = ResolveCache()
+        self.sessions = BrowserSessionStore()
+        self.router = SiteRouter()
+        self.router.register_handler(self)
+
+    def resolve(self, url: str, progress_callback=None, control=None) -> Optional[tuple]:
+        """비디오 URL 및 제목 추출 (결과는 캐시됨)"""
+        return self._resolved.get(url, lambda: self._extract_video_url(url, progress_callback, control),
+                                  control)
+
+    def probe(self, url: str) -> dict:
+        """페이지 메타 태그만 읽어 카탈로그 레코드 반환 (브라우저 없음)"""
+        route = self.router.route(url)
+        return probe_page(url, 'aikive', route.media_id if route else None)
+
+    def _plan(self, url: str, media_url: str, kind: str, container: str, control=None) -> dict:
+        """원본 프로브(미디어 ID별 캐시) 후 처리 방식 결정"""
+        route = self.router.route(url)
+        key = ('aikive', route.media_id if route and route.media_id else url)
+        return plan_pipeline(source_codecs(probe_source(key, media_url, control), 'hls'), kind, container)
+
+    def _extract_video_url(self, url: str, progress_callback=None, control=None) -> Optional[tuple]:
+        """비디오 URL 및 제목 추출 - HTTP 정적 분석 우선, 실패 시 브라우저"""
+        result = self._extract_http(url)
+        if result:
+            EXTRACT_STATS.record('aikive', 'http')
+            return result
+        if control and control.stopped:
+            return None
+        result = self._extract_with_browser(url, progress_callback, control)
+        EXTRACT_STATS.record('aikive', 'browser' if result else 'failed')
+        return result
 
-    @staticmethod
-    def validate_url(url: str) -> bool:
-        """Aikive URL 유효성 검사"""
-        return bool(AikiveDownloader.AIKIVE_REGEX.match(url))
+    def _extract_http(self, url: str) -> Optional[tuple]:
+        """브라우저 없이 페이지 HTML(og:video, 내장 JSON)에서 m3u8 URL 및 제목 추출"""
+        try:
+            html = fetch_page(url, timeout=5)
+        except Exception as e:
+            print(f"HTTP 추출 실패: {e}")
+            return None
 
-    def _extract_video_url(self, url: str, progress_callback=None) -> Optional[tuple]:
+        meta = parse_meta_tags(html)
+        candidates = [meta.get(k) for k in ('og:video:secure_url', 'og:video', 'og:video:url')]
+        candidates += find_media_urls(html, lambda u: '.m3u8' in u)
+        m3u8_urls = [u for u in candidates if u and '.m3u8' in u]
+        if not m3u8_urls:
+            return None
+        # 브라우저 경로와 동일하게 master.m3u8 우선
+        m3u8_url = next((u for u in m3u8_urls if 'master.m3u8' in u), m3u8_urls[0])
+        title = (meta.get('og:title') or meta.get('title') or 'aikive_video').split(' - ')[0].strip()
+        title = re.sub(r'[<>:"/\\|?*]', '', title)
+        return (m3u8_url, title)
+
+    def _extract_with_browser(self, url: str, progress_callback=None, control=None) -> Optional[tuple]:
         """Playwright로 비디오 URL 및 제목 추출"""
         # 번들된 Playwright 브라우저 경로 설정
         setup_playwright_path()
@@ -231,23 +1564,41 @@ class AikiveDownloader:
                 video_urls.append(url)
 
         try:
+            # 이전에 저장한 쿠키/localStorage로 시작 (동의/리다이렉트 생략)
+            state = self.sessions.load('aikive')
             with sync_playwright() as p:
                 browser = p.chromium.launch(headless=True)
-                page = browser.new_page()
-                page.on("response", handle_response)
-                page.goto(url, wait_until="networkidle", timeout=30000)
-
-                # 제목 추출
                 try:
-                    title_el = page.query_selector('h1, .title, [class*="title"]')
-                    if title_el:
-                        title = title_el.inner_text().strip()
-                    else:
-                        title = page.title().split(' - ')[0].strip()
-                except:
-                    pass
-
-                browser.close()
+                    context = browser.new_context(storage_state=state)
+                    page = context.new_page()
+                    page.on("response", handle_response)
+                    page.goto(url, wait_until="domcontentloaded", timeout=30000)
+
+                    # master.m3u8 응답이 잡힐 때까지 대기 (중지 요청 시 즉시 브라우저 종료)
+                    deadline = time.monotonic() + 30
+                    while not any('master.m3u8' in vurl for vurl in video_urls):
+                        if (control and control.stopped) or time.monotonic() > deadline:
+                            break
+                        page.wait_for_timeout(250)
+                    if control and control.stopped:
+                        return None
+                    if any('master.m3u8' in vurl for vurl in video_urls):
+                        self.sessions.save('aikive', context)
+                    elif state:
+                        # 저장된 세션이 원인일 수 있으므로 다음에는 새 세션으로
+                        self.sessions.discard('aikive')
+
+                    # 제목 추출
+                    try:
+                        title_el = page.query_selector('h1, .title, [class*="title"]')
+                        if title_el:
+                            title = title_el.inner_text().strip()
+                        else:
+                            title = page.title().split(' - ')[0].strip()
+                    except:
+                        pass
+                finally:
+                    browser.close()
 
             # m3u8 URL 찾기
             m3u8_url = None
@@ -269,55 +1620,66 @@ class AikiveDownloader:
         self,
         url: str,
         output_path: str,
-        progress_callback: Optional[Callable[[float, str], None]] = None
+        progress_callback: Optional[Callable[[float, str], None]] = None,
+        metadata: Optional[dict] = None,
+        control: Optional[JobControl] = None,
+        container: str = 'mp4'
     ) -> bool:
         """영상 다운로드"""
         if progress_callback:
             progress_callback(0, "비디오 URL 추출 중...")
 
-        result = self._extract_video_url(url, progress_callback)
+        result = self.resolve(url, progress_callback, control)
+        if control and control.stopped:
+            return stop_job(control, None, progress_callback)
         if not result:
+            if control:
+                control.fail(ErrorCode.NOT_FOUND)
             if progress_callback:
                 progress_callback(0, "비디오 URL을 찾을 수 없습니다.")
             return False
 
         m3u8_url, title = result
+        if metadata is not None:
+            metadata.update({'title': title, 'media_url': m3u8_url})
 
         if progress_callback:
             progress_callback(10, f"다운로드 시작: {title}")
 
-        output_file = os.path.join(output_path, f"{title}.mp4")
+        # 원본 코덱을 확인하여 복사로 충분하면 재인코딩하지 않음
+        plan = self._plan(url, m3u8_url, 'video', container, control)
+        if control and control.stopped:
+            return stop_job(control, None, progress_callback)
+        if metadata is not None:
+            metadata['pipeline'] = plan
+        # 같은 디렉터리의 임시 파일에 기록 후 완료 시 최종 이름으로 변경
+        output = AtomicOutput(os.path.join(output_path, f"{title}.{plan['ext']}"))
 
         # FFmpeg로 m3u8 다운로드
-        cmd = [
-            get_ffmpeg_path(), '-y',
-            '-i', m3u8_url,
-            '-c', 'copy',
-            '-bsf:a', 'aac_adtstoasc',
-            output_file
-        ]
+        cmd = [get_ffmpeg_path(), '-y', '-i', m3u8_url] + ffmpeg_output_args(plan) + [output.temp_path]
 
         try:
-            process = subprocess.Popen(
-                cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                universal_newlines=True
-            )
-            self.current_process = process
-
-            # 진행률 시뮬레이션 (FFmpeg는 정확한 진행률을 주지 않음)
             if progress_callback:
                 progress_callback(30, "다운로드 중...")
+            if control:
+                control.set_stage(Stage.DOWNLOADING)
 
-            stdout, stderr = process.communicate()
+            returncode, stderr = run_ffmpeg(cmd, control, owner=self)
+            if control and control.stopped:
+                return stop_job(control, None, progress_callback)
 
-            if process.returncode == 0:
+            if returncode == 0:
+                final_path = output.commit()
+                if metadata is not None:
+                    metadata['filepath'] = final_path
                 if progress_callback:
                     progress_callback(100, "다운로드 완료!")
                 return True
             else:
                 print(f"FFmpeg 오류: {stderr}")
+                if control:
+                    control.fail(ErrorCode.FFMPEG)
+                self._resolved.discard(url)
                 if progress_callback:
                     progress_callback(0, f"다운로드 실패")
                 return False
@@ -327,61 +1689,69 @@ class AikiveDownloader:
                 progress_callback(0, f"오류: {str(e)}")
             return False
         finally:
+            output.discard()
             self.current_process = None
 
     def download_audio(
         self,
         url: str,
         output_path: str,
-        progress_callback: Optional[Callable[[float, str], None]] = None
+        progress_callback: Optional[Callable[[float, str], None]] = None,
+        metadata: Optional[dict] = None,
+        control: Optional[JobControl] = None,
+        container: str = 'mp3'
     ) -> bool:
-        """음원 추출 (MP3)"""
+        """음원 추출 (container: mp3/m4a/opus 또는 원본 코덱 유지 auto)"""
         if progress_callback:
             progress_callback(0, "비디오 URL 추출 중...")
 
-        result = self._extract_video_url(url, progress_callback)
+        result = self.resolve(url, progress_callback, control)
+        if control and control.stopped:
+            return stop_job(control, None, progress_callback)
         if not result:
+            if control:
+                control.fail(ErrorCode.NOT_FOUND)
             if progress_callback:
                 progress_callback(0, "비디오 URL을 찾을 수 없습니다.")
             return False
 
         m3u8_url, title = result
+        if metadata is not None:
+            metadata.update({'title': title, 'media_url': m3u8_url})
 
         if progress_callback:
             progress_callback(10, f"음원 추출 시작: {title}")
 
-        output_file = os.path.join(output_path, f"{title}.mp3")
-
-        # FFmpeg로 오디오만 추출
-        cmd = [
-            get_ffmpeg_path(), '-y',
-            '-i', m3u8_url,
-            '-vn',
-            '-acodec', 'libmp3lame',
-            '-ab', '320k',
-            output_file
-        ]
+        plan = self._plan(url, m3u8_url, 'audio', container, control)
+        if control and control.stopped:
+            return stop_job(control, None, progress_callback)
+        if metadata is not None:
+            metadata['pipeline'] = plan
+        # 같은 디렉터리의 임시 파일에 기록 후 완료 시 최종 이름으로 변경
+        output = AtomicOutput(os.path.join(output_path, f"{title}.{plan['ext']}"))
 
         try:
-            process = subprocess.Popen(
-                cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                universal_newlines=True
-            )
-            self.current_process = process
-
             if progress_callback:
                 progress_callback(30, "음원 추출 중...")
+            if control:
+                control.set_stage(Stage.DOWNLOADING)
 
-            stdout, stderr = process.communicate()
+            returncode, stderr = extract_audio(m3u8_url, output.temp_path, plan, control=control, owner=self)
+            if control and control.stopped:
+                return stop_job(control, None, progress_callback)
 
-            if process.returncode == 0:
+            if returncode == 0:
+                final_path = output.commit()
+                if metadata is not None:
+                    metadata['filepath'] = final_path
                 if progress_callback:
                     progress_callback(100, "음원 추출 완료!")
                 return True
             else:
                 print(f"FFmpeg 오류: {stderr}")
+                if control:
+                    control.fail(ErrorCode.FFMPEG)
+                self._resolved.discard(url)
                 if progress_callback:
                     progress_callback(0, f"추출 실패")
                 return False
@@ -391,23 +1761,94 @@ class AikiveDownloader:
                 progress_callback(0, f"오류: {str(e)}")
             return False
         finally:
+            output.discard()
             self.current_process = None
 
 
+@register_site
 class ThreadsDownloader:
     """Threads 영상 다운로드 클래스"""
 
-    THREADS_REGEX = re.compile(r'https?://(www\.)?threads\.net/@[\w.]+/post/[\w]+')
+    SITES = [
+        ('threads',
+         r'(?:https?://)?(?:www\.)?threads\.(?:net|com)/@(?P<user>[\w.]+)/post/(?P<id>[\w-]+)',
+         'https://www.threads.net/@{user}/post/{id}'),
+        # 게시물 형식이 아닌 Threads URL도 허용 (ID 없음)
+        ('threads', r'(?:https?://)?(?:www\.)?threads\.(?:net|com)(?:/\S*)?', None),
+    ]
 
     def __init__(self):
         self.current_process = None
+        self._resolved = ResolveCache()
+        self.sessions = BrowserSessionStore()
+        self.router = SiteRouter()
+        self.router.register_handler(self)
+
+    def resolve(self, url: str, progress_callback=None, control=None) -> Optional[tuple]:
+        """비디오 URL 및 제목 추출 (결과는 캐시됨)"""
+        return self._resolved.get(url, lambda: self._extract_video_url(url, progress_callback, control),
+                                  control)
+
+    def probe(self, url: str) -> dict:
+        """페이지 메타 태그만 읽어 카탈로그 레코드 반환 (브라우저 없음)"""
+        route = self.router.route(url)
+        return probe_page(route.url if route else url, 'threads', route.media_id if route else None)
+
+    def _plan(self, url: str, media_url: str, kind: str, container: str, control=None) -> dict:
+        """원본 프로브(미디어 ID별 캐시) 후 처리 방식 결정"""
+        route = self.router.route(url)
+        key = ('threads', route.media_id if route and route.media_id else url)
+        return plan_pipeline(source_codecs(probe_source(key, media_url, control)), kind, container)
+
+    def _extract_video_url(self, url: str, progress_callback=None, control=None) -> Optional[tuple]:
+        """비디오 URL 및 제목 추출 - HTTP 정적 분석 우선, 실패 시 브라우저"""
+        # 게시물 URL은 라우터 템플릿으로 threads.net 형식으로 정규화
+        route = self.router.route(url)
+        if route:
+            url = route.url
+        result = self._extract_http(url)
+        if result:
+            EXTRACT_STATS.record('threads', 'http')
+            return result
+        if control and control.stopped:
+            return None
+        result = self._extract_with_browser(url, progress_callback, control)
+        EXTRACT_STATS.record('threads', 'browser' if result else 'failed')
+        return result
+
+    def _title(self, url: str) -> str:
+        """게시물 ID로 파일 제목 생성"""
+        route = self.router.route(url)
+        if route and route.media_id:
+            return re.sub(r'[<>:"/\\|?*@]', '', f"threads_{route.media_id}")
+        return "threads_video"
 
     @staticmethod
-    def validate_url(url: str) -> bool:
-        """Threads URL 유효성 검사"""
-        return bool(ThreadsDownloader.THREADS_REGEX.match(url)) or 'threads.com' in url or 'threads.net' in url
+    def _is_video_cdn_url(resp_url: str) -> bool:
+        """Instagram/Facebook CDN 영상 URL 여부"""
+        return (any(ext in resp_url for ext in ['.mp4', 'video']) and
+                ('cdninstagram' in resp_url or 'fbcdn' in resp_url))
+
+    def _extract_http(self, url: str) -> Optional[tuple]:
+        """브라우저 없이 페이지 HTML(og:video, 내장 JSON)에서 영상 URL 추출"""
+        try:
+            html = fetch_page(url, timeout=5)
+        except Exception as e:
+            print(f"HTTP 추출 실패: {e}")
+            return None
+
+        meta = parse_meta_tags(html)
+        video_url = meta.get('og:video:secure_url') or meta.get('og:video') or meta.get('og:video:url')
+        if not video_url:
+            # 내장 JSON의 video_versions 등 - 페이지에서 가장 먼저 나오는 영상이 메인 게시물
+            video_urls = find_media_urls(html, self._is_video_cdn_url)
+            video_url = video_urls[0] if video_urls else None
+        if not video_url:
+            return None
+
+        return (video_url, self._title(url))
 
-    def _extract_video_url(self, url: str, progress_callback=None) -> Optional[tuple]:
+    def _extract_with_browser(self, url: str, progress_callback=None, control=None) -> Optional[tuple]:
         """Playwright로 비디오 URL 및 제목 추출"""
         # 번들된 Playwright 브라우저 경로 설정
         setup_playwright_path()
@@ -422,43 +1863,39 @@ class ThreadsDownloader:
             progress_callback(5, "페이지 분석 중...")
 
         video_urls = []
-        title = "threads_video"
 
         def handle_response(response):
             resp_url = response.url
-            if any(ext in resp_url for ext in ['.mp4', 'video']):
-                if 'cdninstagram' in resp_url or 'fbcdn' in resp_url:
-                    video_urls.append(resp_url)
+            if self._is_video_cdn_url(resp_url):
+                video_urls.append(resp_url)
 
         try:
+            state = self.sessions.load('threads')
             with sync_playwright() as p:
                 browser = p.chromium.launch(headless=True)
-                page = browser.new_page()
-                page.on("response", handle_response)
-
-                # threads.com을 threads.net으로 변환
-                if 'threads.com' in url:
-                    url = url.replace('threads.com', 'threads.net')
-
-                # domcontentloaded로 빠르게 로드하고 짧게 대기 (첫 비디오만 캡처)
-                page.goto(url, wait_until="domcontentloaded", timeout=30000)
-                page.wait_for_timeout(3000)
-
-                # 제목 추출 (post_id 사용)
                 try:
-                    if '/post/' in url:
-                        post_id = url.split('/post/')[1].split('?')[0]
-                        title = f"threads_{post_id}"
-                except:
-                    pass
-
-                browser.close()
+                    context = browser.new_context(storage_state=state)
+                    page = context.new_page()
+                    page.on("response", handle_response)
+
+                    # domcontentloaded로 빠르게 로드하고 짧게 대기 (첫 비디오만 캡처)
+                    page.goto(url, wait_until="domcontentloaded", timeout=30000)
+                    deadline = time.monotonic() + 3
+                    while not video_urls and time.monotonic() < deadline:
+                        if control and control.stopped:
+                            return None
+                        page.wait_for_timeout(250)
+                    if video_urls:
+                        self.sessions.save('threads', context)
+                    elif state:
+                        self.sessions.discard('threads')
+
+                finally:
+                    browser.close()
 
             if video_urls:
                 # 첫 번째 비디오가 메인 게시물 (추천 영상보다 먼저 로드됨)
-                video_url = video_urls[0]
-                title = re.sub(r'[<>:"/\\|?*@]', '', title)
-                return (video_url, title)
+                return (video_urls[0], self._title(url))
             return None
         except Exception as e:
             print(f"URL 추출 실패: {e}")
@@ -468,53 +1905,66 @@ class ThreadsDownloader:
         self,
         url: str,
         output_path: str,
-        progress_callback: Optional[Callable[[float, str], None]] = None
+        progress_callback: Optional[Callable[[float, str], None]] = None,
+        metadata: Optional[dict] = None,
+        control: Optional[JobControl] = None,
+        container: str = 'mp4'
     ) -> bool:
         """영상 다운로드"""
         if progress_callback:
             progress_callback(0, "비디오 URL 추출 중...")
 
-        result = self._extract_video_url(url, progress_callback)
+        result = self.resolve(url, progress_callback, control)
+        if control and control.stopped:
+            return stop_job(control, None, progress_callback)
         if not result:
+            if control:
+                control.fail(ErrorCode.NOT_FOUND)
             if progress_callback:
                 progress_callback(0, "비디오 URL을 찾을 수 없습니다.")
             return False
 
         video_url, title = result
+        if metadata is not None:
+            metadata.update({'title': title, 'media_url': video_url})
 
         if progress_callback:
             progress_callback(10, f"다운로드 시작: {title}")
 
-        output_file = os.path.join(output_path, f"{title}.mp4")
+        # 원본 코덱을 확인하여 복사로 충분하면 재인코딩하지 않음
+        plan = self._plan(url, video_url, 'video', container, control)
+        if control and control.stopped:
+            return stop_job(control, None, progress_callback)
+        if metadata is not None:
+            metadata['pipeline'] = plan
+        # 같은 디렉터리의 임시 파일에 기록 후 완료 시 최종 이름으로 변경
+        output = AtomicOutput(os.path.join(output_path, f"{title}.{plan['ext']}"))
 
         # FFmpeg로 다운로드
-        cmd = [
-            get_ffmpeg_path(), '-y',
-            '-i', video_url,
-            '-c', 'copy',
-            output_file
-        ]
+        cmd = [get_ffmpeg_path(), '-y', '-i', video_url] + ffmpeg_output_args(plan) + [output.temp_path]
 
         try:
-            process = subprocess.Popen(
-                cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                universal_newlines=True
-            )
-            self.current_process = process
-
             if progress_callback:
                 progress_callback(30, "다운로드 중...")
+            if control:
+                control.set_stage(Stage.DOWNLOADING)
 
-            stdout, stderr = process.communicate()
+            returncode, stderr = run_ffmpeg(cmd, control, owner=self)
+            if control and control.stopped:
+                return stop_job(control, None, progress_callback)
 
-            if process.returncode == 0:
+            if returncode == 0:
+                final_path = output.commit()
+                if metadata is not None:
+                    metadata['filepath'] = final_path
                 if progress_callback:
                     progress_callback(100, "다운로드 완료!")
                 return True
             else:
                 print(f"FFmpeg 오류: {stderr}")
+                if control:
+                    control.fail(ErrorCode.FFMPEG)
+                self._resolved.discard(url)
                 if progress_callback:
                     progress_callback(0, f"다운로드 실패")
                 return False
@@ -524,60 +1974,69 @@ class ThreadsDownloader:
                 progress_callback(0, f"오류: {str(e)}")
             return False
         finally:
+            output.discard()
             self.current_process = None
 
     def download_audio(
         self,
         url: str,
         output_path: str,
-        progress_callback: Optional[Callable[[float, str], None]] = None
+        progress_callback: Optional[Callable[[float, str], None]] = None,
+        metadata: Optional[dict] = None,
+        control: Optional[JobControl] = None,
+        container: str = 'mp3'
     ) -> bool:
-        """음원 추출 (MP3)"""
+        """음원 추출 (container: mp3/m4a/opus 또는 원본 코덱 유지 auto)"""
         if progress_callback:
             progress_callback(0, "비디오 URL 추출 중...")
 
-        result = self._extract_video_url(url, progress_callback)
+        result = self.resolve(url, progress_callback, control)
+        if control and control.stopped:
+            return stop_job(control, None, progress_callback)
         if not result:
+            if control:
+                control.fail(ErrorCode.NOT_FOUND)
             if progress_callback:
                 progress_callback(0, "비디오 URL을 찾을 수 없습니다.")
             return False
 
         video_url, title = result
+        if metadata is not None:
+            metadata.update({'title': title, 'media_url': video_url})
 
         if progress_callback:
             progress_callback(10, f"음원 추출 시작: {title}")
 
-        output_file = os.path.join(output_path, f"{title}.mp3")
-
-        cmd = [
-            get_ffmpeg_path(), '-y',
-            '-i', video_url,
-            '-vn',
-            '-acodec', 'libmp3lame',
-            '-ab', '320k',
-            output_file
-        ]
+        plan = self._plan(url, video_url, 'audio', container, control)
+        if control and control.stopped:
+            return stop_job(control, None, progress_callback)
+        if metadata is not None:
+            metadata['pipeline'] = plan
+        # 같은 디렉터리의 임시 파일에 기록 후 완료 시 최종 이름으로 변경
+        output = AtomicOutput(os.path.join(output_path, f"{title}.{plan['ext']}"))
 
         try:
-            process = subprocess.Popen(
-                cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                universal_newlines=True
-            )
-            self.current_process = process
-
             if progress_callback:
                 progress_callback(30, "음원 추출 중...")
+            if control:
+                control.set_stage(Stage.DOWNLOADING)
 
-            stdout, stderr = process.communicate()
+            returncode, stderr = extract_audio(video_url, output.temp_path, plan, control=control, owner=self)
+            if control and control.stopped:
+                return stop_job(control, None, progress_callback)
 
-            if process.returncode == 0:
+            if returncode == 0:
+                final_path = output.commit()
+                if metadata is not None:
+                    metadata['filepath'] = final_path
                 if progress_callback:
                     progress_callback(100, "음원 추출 완료!")
                 return True
             else:
                 print(f"FFmpeg 오류: {stderr}")
+                if control:
+                    control.fail(ErrorCode.FFMPEG)
+                self._resolved.discard(url)
                 if progress_callback:
                     progress_callback(0, f"추출 실패")
                 return False
@@ -587,43 +2046,149 @@ class ThreadsDownloader:
                 progress_callback(0, f"오류: {str(e)}")
             return False
         finally:
+            output.discard()
             self.current_process = None
 
 
 class UniversalDownloader:
     """통합 다운로더 - URL에 따라 적절한 다운로더 선택"""
 
-    def __init__(self):
-        self.youtube = YouTubeDownloader()
-        self.aikive = AikiveDownloader()
-        self.threads = ThreadsDownloader()
+    def __init__(self, browser_profile: str = 'default', format_policy: Optional[FormatPolicy] = None):
+        # 등록된 사이트 클래스마다 인스턴스 하나씩 생성하여 라우터에 연결
+        self.handlers = {cls: cls() for cls in SITE_REGISTRY}
+        self.router = SiteRouter()
+        self.browser_sessions = BrowserSessionStore(browser_profile)
+        for handler in self.handlers.values():
+            self.router.register_handler(handler)
+            # 브라우저를 쓰는 다운로더는 프로필(워커)별 저장 상태를 공유
+            if hasattr(handler, 'sessions'):
+                handler.sessions = self.browser_sessions
+        self.youtube = self.handlers[YouTubeDownloader]
+        self.aikive = self.handlers[AikiveDownloader]
+        self.threads = self.handlers[ThreadsDownloader]
+        self._catalog_cache = ResolveCache(maxsize=4096)
+        self._prefetch_lock = threading.Lock()
+        self._prefetching = False  # 사전 추출 스레드 실행 중
+        self._prefetch_next = None  # 다음에 추출할 Route (최신 입력만 유지)
+        if format_policy is not None:
+            self.set_format_policy(format_policy)
+
+    def set_format_policy(self, policy: FormatPolicy):
+        """영상 포맷 선택 정책 변경 (포맷 선택을 지원하는 다운로더에 적용)"""
+        for handler in self.handlers.values():
+            if hasattr(handler, 'format_policy'):
+                handler.format_policy = policy
 
     def validate_url(self, url: str) -> bool:
         """URL 유효성 검사"""
-        return (self.youtube.validate_url(url) or
-                self.aikive.validate_url(url) or
-                self.threads.validate_url(url))
+        return self.router.route(url) is not None
+
+    def route(self, url: str) -> Optional[Route]:
+        """URL의 사이트, 핸들러, 미디어 ID, 정규화 URL 반환"""
+        return self.router.route(url.strip())
+
+    def ingest(self, lines: Iterable[str], stats: Optional[dict] = None) -> Iterator[Route]:
+        """대량 URL 정규화/중복 제거 - 지원 URL을 입력 순서대로 한 번씩 반환"""
+        seen = set()
+        if stats is None:
+            stats = {}
+        stats.update(total=0, unsupported=0, duplicate=0)
+        route = self.router.route
+        for line in lines:
+            url = line.strip()
+            if not url or url.startswith('#'):
+                continue
+            stats['total'] += 1
+            r = route(url)
+            if r is None:
+                stats['unsupported'] += 1
+                continue
+            key = (r.site, r.media_id) if r.media_id else r.url
+            if key in seen:
+                stats['duplicate'] += 1
+                continue
+            seen.add(key)
+            yield r
+
+    def prefetch(self, url: str) -> bool:
+        """다운로드 확정 전에 메타데이터/미디어 URL을 백그라운드에서 미리 추출
+
+        입력 중인 미완성 URL은 건너뛰도록 미디어 ID가 있는 URL만 추출하고,
+        추출은 한 번에 하나만 실행 (진행 중이면 가장 최근 URL만 대기)
+        """
+        route = self.router.route(url.strip())
+        if not route or not route.media_id:
+            return False
+        with self._prefetch_lock:
+            self._prefetch_next = route
+            if self._prefetching:
+                return True
+            self._prefetching = True
+
+        def run():
+            while True:
+                with self._prefetch_lock:
+                    route = self._prefetch_next
+                    self._prefetch_next = None
+                    if route is None:
+                        self._prefetching = False
+                        return
+                try:
+                    route.handler.resolve(route.source_url)
+                except Exception as e:
+                    print(f"사전 추출 실패: {e}")
+
+        threading.Thread(target=run, daemon=True).start()
+        return True
 
     def get_downloader(self, url: str):
         """URL에 맞는 다운로더 반환"""
-        if self.aikive.validate_url(url):
-            return self.aikive
-        elif self.threads.validate_url(url):
-            return self.threads
-        elif self.youtube.validate_url(url):
-            return self.youtube
-        return None
+        r = self.router.route(url)
+        return r.handler if r else None
 
-    def download_video(self, url: str, output_path: str, progress_callback=None) -> bool:
-        """영상 다운로드"""
+    @staticmethod
+    def extract_stats() -> dict:
+        """사이트별 추출 단계(http/browser/failed) 횟수"""
+        return EXTRACT_STATS.snapshot()
+
+    def probe(self, url: str) -> dict:
+        """단일 URL 메타데이터 레코드 (미디어 저장 없음, 실패 시 error 필드 기록)"""
+        downloader = self.get_downloader(url)
+        if not downloader:
+            return {'url': url, 'error': '지원하지 않는 URL'}
+        try:
+            return self._catalog_cache.get(url, lambda: downloader.probe(url))
+        except Exception as e:
+            return {'url': url, 'error': str(e)}
+
+    def catalog(self, urls: Iterable[str], workers: int = 8) -> Iterator[dict]:
+        """여러 URL의 메타데이터를 병렬 추출 - 완료되는 순서대로 레코드 반환"""
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            pending = set()
+            for url in urls:
+                pending.add(pool.submit(self.probe, url))
+                # 대량 입력에서도 대기 작업 수를 제한 (메모리 일정 유지)
+                if len(pending) >= workers * 2:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield future.result()
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+
+    def download_video(self, url: str, output_path: str, progress_callback=None, metadata=None,
+                       control=None, container: str = 'mp4') -> bool:
+        """영상 다운로드 (metadata에 선택된 포맷 등 작업 정보 기록, control로 취소/일시정지)"""
         downloader = self.get_downloader(url)
         if downloader:
-            return downloader.download_video(url, output_path, progress_callback)
+            return downloader.download_video(url, output_path, progress_callback, metadata, control, container)
         return False
 
-    def download_audio(self, url: str, output_path: str, progress_callback=None) -> bool:
-        """음원 추출"""
+    def download_audio(self, url: str, output_path: str, progress_callback=None, metadata=None,
+                       control=None, container: str = 'mp3') -> bool:
+        """음원 추출 (container: mp3/m4a/opus/auto)"""
         downloader = self.get_downloader(url)
         if downloader:
-            return downloader.download_audio(url, output_path, progress_callback)
+            return downloader.download_audio(url, output_path, progress_callback, metadata, control, container)
         return False
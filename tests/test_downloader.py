@@ -0,0 +1,249 @@
+"""downloader 순수 로직 테스트 (네트워크/ffmpeg 없이 실행)"""
+import pytest
+
+from downloader import (FormatPolicy, UniversalDownloader, mp3_chunk_plan, mp3_frames, mp3_trim,
+                        plan_pipeline, select_format)
+
+
+def mp3_frame(marker: int = 0, bitrate_index: int = 9, rate_index: int = 0, padding: int = 0,
+              version: int = 3) -> bytes:
+    """Layer III 프레임 하나 생성 (본문 앞 2바이트에 marker 기록)"""
+    header = (0x7FF << 21) | (version << 19) | (1 << 17) | (1 << 16) \
+        | (bitrate_index << 12) | (rate_index << 10) | (padding << 9)
+    mpeg1 = version == 3
+    bitrate = ([0, 32, 40, 48, 56, 64, 80, 96, 112, 128] if mpeg1
+               else [0, 8, 16, 24, 32, 40, 48, 56, 64, 80])[bitrate_index] * 1000
+    sample_rate = {3: [44100, 48000, 32000], 2: [22050, 24000, 16000]}[version][rate_index]
+    length = (144 if mpeg1 else 72) * bitrate // sample_rate + padding
+    return header.to_bytes(4, 'big') + marker.to_bytes(2, 'big') + bytes(length - 6)
+
+
+def markers(data: bytes) -> list:
+    return [int.from_bytes(data[pos + 4:pos + 6], 'big') for pos, _ in mp3_frames(data)]
+
+
+# --- mp3_frames ---
+
+def test_mp3_frames_lengths():
+    data = mp3_frame() + mp3_frame(padding=1) + mp3_frame(rate_index=1)
+    # 128kbps/44.1kHz = 417(+1 패딩), 128kbps/48kHz = 384
+    assert mp3_frames(data) == [(0, 417), (417, 418), (835, 384)]
+
+
+def test_mp3_frames_mpeg2():
+    # 64kbps/22.05kHz MPEG2 = 72 * 64000 // 22050
+    assert mp3_frames(mp3_frame(bitrate_index=8, version=2)) == [(0, 208)]
+
+
+def test_mp3_frames_resyncs_after_garbage():
+    data = b'ID3\x00junk' + mp3_frame(1) + mp3_frame(2)
+    assert [pos for pos, _ in mp3_frames(data)] == [8, 425]
+    assert markers(data) == [1, 2]
+
+
+def test_mp3_frames_ignores_truncated_tail():
+    assert mp3_frames(mp3_frame() + b'\xff\xfb') == [(0, 417)]
+
+
+# --- 구간 분할 / 겹친 프레임 제거 ---
+
+@pytest.mark.parametrize('total, chunk, preroll', [
+    (1, 5, 16), (10, 10, 16), (100, 7, 3), (1000, 120, 16), (33, 4, 16),
+])
+def test_mp3_chunk_plan_covers_every_frame_once(total, chunk, preroll):
+    plan = mp3_chunk_plan(total, chunk, preroll)
+    kept = []
+    for read_start, read_frames, skip, count in plan:
+        assert read_start >= 0
+        assert skip == min(preroll, read_start + skip)  # 첫 구간은 앞 겹침 없음
+        start = read_start + skip
+        end = total if count is None else start + count
+        kept.extend(range(start, end))
+        assert read_start + read_frames >= end
+    assert kept == list(range(total))
+    assert [c[3] for c in plan].count(None) == 1 and plan[-1][3] is None
+
+
+def test_mp3_chunk_plan_stitches_like_single_encode():
+    # 입력 프레임 하나당 출력 프레임 하나를 만드는 가상 인코더로 이어붙인 결과 확인
+    total = 50
+    out = b''
+    for read_start, read_frames, skip, count in mp3_chunk_plan(total, 8, 4):
+        encoded = b''.join(mp3_frame(i) for i in range(read_start, min(read_start + read_frames, total)))
+        out += mp3_trim(encoded, skip, count)
+    assert markers(out) == list(range(total))
+
+
+def test_mp3_trim():
+    data = b''.join(mp3_frame(i) for i in range(6))
+    assert markers(mp3_trim(data, 2, 3)) == [2, 3, 4]
+    assert markers(mp3_trim(data, 4)) == [4, 5]
+    assert mp3_trim(data, 6) == b''
+
+
+# --- 사이트 라우팅 ---
+
+@pytest.fixture(scope='module')
+def downloader():
+    return UniversalDownloader()
+
+
+@pytest.mark.parametrize('url, site, media_id, normalized', [
+    ('https://www.youtube.com/watch?v=dQw4w9WgXcQ&list=PL1&t=30', 'youtube', 'dQw4w9WgXcQ',
+     'https://www.youtube.com/watch?v=dQw4w9WgXcQ'),
+    ('https://youtu.be/dQw4w9WgXcQ?t=3', 'youtube', 'dQw4w9WgXcQ',
+     'https://www.youtube.com/watch?v=dQw4w9WgXcQ'),
+    ('https://m.youtube.com/watch?feature=share&v=dQw4w9WgXcQ', 'youtube', 'dQw4w9WgXcQ',
+     'https://www.youtube.com/watch?v=dQw4w9WgXcQ'),
+    ('https://www.youtube.com/shorts/dQw4w9WgXcQ', 'youtube', 'dQw4w9WgXcQ',
+     'https://www.youtube.com/watch?v=dQw4w9WgXcQ'),
+    ('https://www.youtube.com/channel/UCabcdefghijklmn', 'youtube', None,
+     'https://www.youtube.com/channel/UCabcdefghijklmn'),
+    ('https://www.youtube.com/@somechannel1/videos', 'youtube', None,
+     'https://www.youtube.com/@somechannel1/videos'),
+    ('https://www.youtube.com/embed/videoseries?list=PLx', 'youtube', None,
+     'https://www.youtube.com/embed/videoseries?list=PLx'),
+    ('https://www.instagram.com/reel/Cabc-12_x/', 'instagram', 'Cabc-12_x',
+     'https://www.instagram.com/p/Cabc-12_x/'),
+    ('https://aikive.com/list-video/shorts/123', 'aikive', '123',
+     'https://aikive.com/list-video/shorts/123'),
+    ('https://www.threads.com/@some.user/post/XyZ-1?x=1', 'threads', 'XyZ-1',
+     'https://www.threads.net/@some.user/post/XyZ-1'),
+    ('https://www.threads.net/@some.user', 'threads', None, 'https://www.threads.net/@some.user'),
+])
+def test_route(downloader, url, site, media_id, normalized):
+    route = downloader.route(url)
+    assert (route.site, route.media_id, route.url, route.source_url) == (site, media_id, normalized, url)
+
+
+def test_route_unsupported(downloader):
+    assert downloader.route('https://example.com/watch?v=dQw4w9WgXcQ') is None
+    assert not downloader.validate_url('https://example.com/')
+
+
+def test_ingest_dedups_by_media_id(downloader):
+    stats = {}
+    routes = list(downloader.ingest([
+        'https://youtu.be/dQw4w9WgXcQ',
+        '  https://www.youtube.com/watch?v=dQw4w9WgXcQ&t=5  ',
+        '# 주석',
+        '',
+        'https://example.com/',
+        'https://www.youtube.com/channel/UCaaaaaaaaaaaaaaa',
+        'https://www.youtube.com/channel/UCbbbbbbbbbbbbbbb',
+        'https://www.youtube.com/channel/UCbbbbbbbbbbbbbbb',
+    ], stats))
+    assert [r.source_url for r in routes] == [
+        'https://youtu.be/dQw4w9WgXcQ',
+        'https://www.youtube.com/channel/UCaaaaaaaaaaaaaaa',
+        'https://www.youtube.com/channel/UCbbbbbbbbbbbbbbb',
+    ]
+    assert stats == {'total': 6, 'unsupported': 1, 'duplicate': 2}
+
+
+# --- 포맷 선택 ---
+
+def video(fid, height, size=None, vcodec='avc1.640028', ext='mp4', tbr=None):
+    return {'format_id': fid, 'height': height, 'vcodec': vcodec, 'acodec': 'none', 'ext': ext,
+            'filesize': size, 'tbr': tbr}
+
+
+def audio(fid, size=None, ext='m4a', abr=128):
+    return {'format_id': fid, 'vcodec': 'none', 'acodec': 'mp4a.40.2', 'ext': ext, 'filesize': size,
+            'abr': abr}
+
+
+def muxed(fid, height, size=None):
+    return {'format_id': fid, 'height': height, 'vcodec': 'avc1.64001F', 'acodec': 'mp4a.40.2',
+            'ext': 'mp4', 'filesize': size}
+
+
+def test_select_format_respects_max_height():
+    info = {'formats': [video('401', 2160), video('137', 1080), audio('140'), audio('251', ext='webm')]}
+    decision = select_format(info, FormatPolicy(max_height=1080))
+    assert decision['format'] == '137+140'
+    assert not decision['premuxed']
+
+
+def test_select_format_prefers_codec_at_same_height():
+    info = {'formats': [video('248', 1080, vcodec='vp9', ext='webm'), video('137', 1080), audio('140')]}
+    assert select_format(info, FormatPolicy())['format'] == '137+140'
+
+
+def test_select_format_prefers_premuxed_at_same_height():
+    info = {'formats': [video('136', 720), audio('140'), muxed('22', 720)]}
+    assert select_format(info, FormatPolicy())['format'] == '22'
+    assert select_format(info, FormatPolicy(prefer_premuxed=False))['format'] == '136+140'
+
+
+def test_select_format_higher_pair_beats_lower_premuxed():
+    info = {'formats': [video('137', 1080), audio('140'), muxed('18', 360)]}
+    assert select_format(info, FormatPolicy())['format'] == '137+140'
+
+
+def test_select_format_size_cap():
+    info = {'formats': [video('137', 1080, size=900), video('136', 720, size=400), audio('140', size=50)]}
+    assert select_format(info, FormatPolicy(max_filesize=500))['format'] == '136+140'
+
+
+def test_select_format_size_cap_unmet_picks_smallest():
+    info = {'formats': [video('137', 1080, size=900), video('136', 720, size=400), audio('140', size=50)]}
+    decision = select_format(info, FormatPolicy(max_filesize=100))
+    assert decision['format'] == '136+140'
+    assert decision['reason'].startswith('size cap unmet')
+
+
+def test_select_format_partial_size_counts_against_cap():
+    # 음원 크기를 몰라도 영상만으로 제한을 넘으면 제외
+    info = {'formats': [video('137', 1080, size=900), video('136', 720, size=100), audio('140')]}
+    assert select_format(info, FormatPolicy(max_filesize=500))['format'] == '136+140'
+
+
+def test_select_format_estimates_size_from_bitrate():
+    info = {'duration': 100, 'formats': [video('137', 1080, tbr=4000), video('136', 720, tbr=1000),
+                                         audio('140', size=1)]}
+    # 4000kbps * 100초 = 50MB, 1000kbps * 100초 = 12.5MB
+    assert select_format(info, FormatPolicy(max_filesize=20_000_000))['format'] == '136+140'
+
+
+def test_select_format_without_formats():
+    assert select_format({'formats': []}, FormatPolicy()) is None
+    assert select_format({}, FormatPolicy()) is None
+
+
+# --- 처리 방식 결정 ---
+
+def test_plan_audio_copy_when_codec_fits():
+    plan = plan_pipeline({'audio': 'aac', 'video': 'h264', 'format': 'mp4'}, 'audio', 'm4a')
+    assert (plan['ext'], plan['video'], plan['audio'], plan['audio_bitrate']) == ('m4a', None, 'copy', None)
+
+
+def test_plan_audio_reencode():
+    plan = plan_pipeline({'audio': 'aac', 'format': 'mp4'}, 'audio', 'mp3')
+    assert (plan['audio'], plan['audio_bitrate']) == ('libmp3lame', '320k')
+
+
+def test_plan_audio_auto_keeps_source_codec():
+    assert plan_pipeline({'audio': 'opus'}, 'audio', 'auto')['container'] == 'opus'
+    assert plan_pipeline({'audio': 'flac'}, 'audio', 'auto')['container'] == 'mp3'
+
+
+def test_plan_video_copy_and_reencode():
+    plan = plan_pipeline({'video': 'h264', 'audio': 'aac', 'format': 'mov,mp4'}, 'video', 'mp4')
+    assert (plan['video'], plan['audio']) == ('copy', 'copy')
+    plan = plan_pipeline({'video': 'vp9', 'audio': 'opus'}, 'video', 'mp4')
+    assert (plan['video'], plan['audio'], plan['audio_bitrate']) == ('libx264', 'aac', '192k')
+    plan = plan_pipeline({'video': 'vp9', 'audio': 'opus'}, 'video', 'mkv')
+    assert (plan['ext'], plan['video'], plan['audio']) == ('mkv', 'copy', 'copy')
+
+
+def test_plan_unknown_codecs_copy():
+    plan = plan_pipeline({'video': None, 'audio': None}, 'video', 'mp4')
+    assert (plan['video'], plan['audio']) == ('copy', 'copy')
+
+
+def test_plan_hls_aac_into_mp4_adds_bsf():
+    assert plan_pipeline({'video': 'h264', 'audio': 'aac', 'format': 'hls'}, 'video', 'mp4')['bsf'] \
+        == 'aac_adtstoasc'
+    assert 'bsf' not in plan_pipeline({'video': 'h264', 'audio': 'aac', 'format': 'hls'}, 'video', 'mkv')
+    assert 'bsf' not in plan_pipeline({'video': 'h264', 'audio': 'aac', 'format': 'mp4'}, 'video', 'mp4')
@@ -0,0 +1,133 @@
+"""코디네이터 작업 상태 전이 테스트 (HTTP 서버 없이 직접 호출)"""
+import time
+
+import pytest
+
+from worker import Coordinator
+
+URL_A = 'https://youtu.be/dQw4w9WgXcQ'
+URL_B = 'https://www.instagram.com/p/Cabc123/'
+
+
+@pytest.fixture
+def coordinator():
+    return Coordinator(lease_timeout=60, max_attempts=2)
+
+
+def test_submit_dedups(coordinator):
+    ids = coordinator.submit([URL_A, URL_B, 'https://www.youtube.com/watch?v=dQw4w9WgXcQ'])
+    assert len(ids) == 2
+    assert coordinator.submit([URL_A]) == []
+    # 같은 URL이라도 형식이 다르면 별도 작업
+    assert len(coordinator.submit([URL_A], 'audio')) == 1
+    # 기본 컨테이너를 명시해도 같은 작업
+    assert coordinator.submit([URL_A], 'audio', 'mp3') == []
+    # 포맷 정책이 다르면 별도 작업
+    assert len(coordinator.submit([URL_A], format_policy={'max_height': 720})) == 1
+
+
+def test_submit_rejects_invalid(coordinator):
+    with pytest.raises(ValueError):
+        coordinator.submit([URL_A], 'audio', 'mkv')
+    with pytest.raises(ValueError):
+        coordinator.submit([URL_A], 'video', 'mp3')
+    with pytest.raises(ValueError):
+        coordinator.submit([URL_A], format_policy={'bogus': 1})
+
+
+def test_submit_keeps_source_url(coordinator):
+    coordinator.submit(['https://www.youtube.com/watch?v=dQw4w9WgXcQ&list=PL1'])
+    assert coordinator.lease('w1')['url'] == 'https://www.youtube.com/watch?v=dQw4w9WgXcQ&list=PL1'
+
+
+def test_lease_in_order_once(coordinator):
+    a, b = coordinator.submit([URL_A, URL_B])
+    job = coordinator.lease('w1')
+    assert (job['id'], job['state'], job['worker'], job['attempts']) == (a, 'leased', 'w1', 1)
+    assert coordinator.lease('w2')['id'] == b
+    assert coordinator.lease('w3') is None
+
+
+def test_heartbeat_updates_progress_for_owner_only(coordinator):
+    job_id, = coordinator.submit([URL_A])
+    coordinator.lease('w1')
+    assert coordinator.heartbeat(job_id, 'w2', {'percent': 50}) == {'ok': False, 'control': None}
+    assert coordinator.heartbeat(job_id, 'w1', {'percent': 50, 'speed': 'fast'}) == {'ok': True, 'control': None}
+    job = coordinator.snapshot()['jobs'][0]
+    assert job['percent'] == 50
+    assert job['speed'] == 0  # 숫자가 아닌 값은 무시
+
+
+def test_complete_success(coordinator):
+    job_id, = coordinator.submit([URL_A])
+    coordinator.lease('w1')
+    assert not coordinator.complete(job_id, 'w2', True)
+    assert coordinator.complete(job_id, 'w1', True, metadata={'title': 't'})
+    job = coordinator.snapshot()['jobs'][0]
+    assert (job['state'], job['percent'], job['worker'], job['metadata']) == ('done', 100, None, {'title': 't'})
+    assert not coordinator.complete(job_id, 'w1', True)  # 이미 완료된 작업
+
+
+def test_failure_retries_then_fails(coordinator):
+    job_id, = coordinator.submit([URL_A])
+    coordinator.lease('w1')
+    coordinator.complete(job_id, 'w1', False, 'download')
+    assert coordinator.snapshot()['counts'] == {'queued': 1}
+    assert coordinator.lease('w2')['attempts'] == 2
+    coordinator.complete(job_id, 'w2', False, 'download')
+    job = coordinator.snapshot()['jobs'][0]
+    assert (job['state'], job['error']) == ('failed', 'download')
+    assert coordinator.lease('w3') is None
+    # 실패한 작업은 다시 제출 가능
+    assert len(coordinator.submit([URL_A])) == 1
+
+
+def test_reap_requeues_expired_lease():
+    coordinator = Coordinator(lease_timeout=0.01, max_attempts=2)
+    job_id, = coordinator.submit([URL_A])
+    coordinator.lease('w1')
+    time.sleep(0.02)
+    assert coordinator.reap() == 1
+    assert coordinator.snapshot()['jobs'][0]['state'] == 'queued'
+    # 회수된 임대로는 하트비트/완료 보고 불가
+    assert not coordinator.heartbeat(job_id, 'w1', {})['ok']
+    assert not coordinator.complete(job_id, 'w1', True)
+    coordinator.lease('w2')
+    time.sleep(0.02)
+    assert coordinator.reap() == 1
+    assert coordinator.snapshot()['jobs'][0]['state'] == 'failed'
+
+
+def test_reap_keeps_live_lease(coordinator):
+    coordinator.submit([URL_A])
+    coordinator.lease('w1')
+    assert coordinator.reap() == 0
+
+
+def test_cancel_leased_job(coordinator):
+    job_id, = coordinator.submit([URL_A])
+    coordinator.lease('w1')
+    assert coordinator.control(job_id, 'cancel')
+    assert coordinator.heartbeat(job_id, 'w1', {})['control'] == 'cancel'
+    coordinator.complete(job_id, 'w1', False, stopped='cancelled')
+    assert coordinator.snapshot()['jobs'][0]['state'] == 'cancelled'
+    assert not coordinator.control(job_id, 'resume')
+    assert len(coordinator.submit([URL_A])) == 1
+
+
+def test_pause_and_resume(coordinator):
+    job_id, = coordinator.submit([URL_A])
+    coordinator.lease('w1')
+    coordinator.control(job_id, 'pause')
+    coordinator.complete(job_id, 'w1', False, stopped='paused')
+    job = coordinator.snapshot()['jobs'][0]
+    assert (job['state'], job['attempts']) == ('paused', 0)  # 일시정지는 시도 횟수에 포함하지 않음
+    assert coordinator.submit([URL_A]) == []  # 일시정지된 작업은 재제출 대상 아님
+    assert coordinator.control(job_id, 'resume')
+    assert coordinator.lease('w2')['id'] == job_id
+
+
+def test_cancel_queued_job_is_skipped(coordinator):
+    a, b = coordinator.submit([URL_A, URL_B])
+    assert coordinator.control(a, 'cancel')
+    assert coordinator.lease('w1')['id'] == b
@@ -0,0 +1,384 @@
+"""분산 작업 모드 - 코디네이터(작업 큐) + 워커 프로세스 (HTTP/JSON 프로토콜)"""
+import json
+import os
+import socket
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from multiprocessing import Process
+from typing import Iterable, Optional
+from downloader import (AUDIO_CONTAINERS, VIDEO_CONTAINERS, FormatPolicy, JobControl, JobRecord,
+                        UniversalDownloader)
+
+# 하트비트로 받는 진행 상황 필드 (숫자만)
+PROGRESS_FIELDS = ('stage', 'percent', 'bytes_done', 'bytes_total', 'speed')
+
+
+class Coordinator:
+    """작업 큐를 보관하고 워커에 작업을 임대(lease) - 하트비트가 끊기면 다시 대기열로"""
+
+    def __init__(self, lease_timeout: float = 60, max_attempts: int = 3):
+        self.lease_timeout = lease_timeout
+        self.max_attempts = max_attempts
+        self.downloader = UniversalDownloader()
+        self._lock = threading.Lock()
+        self._jobs = {}  # job_id -> 작업 정보
+        self._keys = {}  # (사이트, 미디어 ID) -> job_id (중복 제출 방지)
+        self._queue = deque()
+
+    def submit(self, urls: Iterable[str], kind: str = 'video', container: Optional[str] = None,
+               format_policy: Optional[dict] = None) -> list:
+        """URL 목록을 작업으로 등록 - 새로 등록된 job_id 목록 반환 (format_policy: FormatPolicy 인자)"""
+        valid = set(AUDIO_CONTAINERS) | {'auto'} if kind == 'audio' else set(VIDEO_CONTAINERS)
+        if kind not in ('video', 'audio') or (container and container not in valid):
+            raise ValueError(f"지원하지 않는 형식: {kind}/{container}")
+        format_policy = dict(format_policy or {})
+        try:
+            FormatPolicy(**format_policy)
+        except TypeError:
+            raise ValueError(f"지원하지 않는 포맷 정책: {format_policy}")
+        # 기본 컨테이너를 먼저 정해 생략한 요청과 명시한 요청이 같은 작업으로 판별되도록
+        container = container or ('mp3' if kind == 'audio' else 'mp4')
+        ids = []
+        with self._lock:
+            for route in self.downloader.ingest(urls):
+                key = ((route.site, route.media_id) if route.media_id else route.url, kind, container,
+                       tuple(sorted(format_policy.items())))
+                # 실패/취소된 작업은 같은 URL로 다시 제출 가능
+                previous = self._jobs.get(self._keys.get(key))
+                if previous and previous['state'] not in ('failed', 'cancelled'):
+                    continue
+                job_id = uuid.uuid4().hex[:12]
+                self._keys[key] = job_id
+                self._jobs[job_id] = {
+                    'id': job_id,
+                    'url': route.source_url,
+                    'site': route.site,
+                    'kind': kind,
+                    'container': container,
+                    'format_policy': format_policy,
+                    'state': 'queued',
+                    'worker': None,
+                    'lease_expires': None,
+                    'attempts': 0,
+                    # 진행 상황은 숫자만 보관 (Stage 값, 바이트, 바이트/초)
+                    'stage': 0,
+                    'percent': 0,
+                    'bytes_done': 0,
+                    'bytes_total': 0,
+                    'speed': 0,
+                    'error': None,
+                    'metadata': {},
+                    'control': None,  # 진행 중인 작업에 전달할 요청 (cancel/pause)
+                }
+                self._queue.append(job_id)
+                ids.append(job_id)
+        return ids
+
+    def lease(self, worker_id: str) -> Optional[dict]:
+        """대기 중인 작업 하나를 워커에 임대"""
+        with self._lock:
+            while self._queue:
+                job = self._jobs[self._queue.popleft()]
+                if job['state'] != 'queued':
+                    continue
+                job.update(state='leased', worker=worker_id,
+                           lease_expires=time.time() + self.lease_timeout)
+                job['attempts'] += 1
+                return dict(job)
+        return None
+
+    def heartbeat(self, job_id: str, worker_id: str, progress: dict) -> dict:
+        """진행률 보고 및 임대 연장 - 임대 유지 여부와 대기 중인 취소/일시정지 요청 반환"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if not job or job['state'] != 'leased' or job['worker'] != worker_id:
+                return {'ok': False, 'control': None}
+            for key in PROGRESS_FIELDS:
+                if isinstance(progress.get(key), (int, float)):
+                    job[key] = progress[key]
+            job['lease_expires'] = time.time() + self.lease_timeout
+            return {'ok': True, 'control': job['control']}
+
+    def control(self, job_id: str, action: str) -> bool:
+        """작업 취소/일시정지/재개 - 진행 중인 작업은 다음 하트비트에서 워커에 전달"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if not job:
+                return False
+            if action == 'resume':
+                if job['state'] != 'paused':
+                    return False
+                job.update(state='queued', control=None)
+                self._queue.append(job_id)
+            elif action in ('cancel', 'pause'):
+                if job['state'] == 'queued':
+                    # 대기열에서는 lease 시 상태를 보고 건너뜀
+                    job['state'] = 'cancelled' if action == 'cancel' else 'paused'
+                elif job['state'] == 'leased':
+                    job['control'] = action
+                elif job['state'] == 'paused' and action == 'cancel':
+                    job['state'] = 'cancelled'
+                else:
+                    return False
+            else:
+                return False
+            return True
+
+    def complete(self, job_id: str, worker_id: str, ok: bool, error: Optional[str] = None,
+                 metadata: Optional[dict] = None, stopped: Optional[str] = None) -> bool:
+        """작업 완료/실패/중지 보고 - 실패 시 재시도 횟수 내에서 다시 대기열로"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if not job or job['state'] != 'leased' or job['worker'] != worker_id:
+                return False
+            job.update(worker=None, lease_expires=None, error=error, metadata=metadata or {}, control=None,
+                       speed=0)
+            if stopped in (JobControl.CANCELLED, JobControl.PAUSED):
+                job['state'] = stopped
+                if stopped == JobControl.PAUSED:
+                    job['attempts'] -= 1  # 일시정지는 시도 횟수에 포함하지 않음
+            elif ok:
+                job.update(state='done', percent=100)
+            elif job['attempts'] < self.max_attempts:
+                job['state'] = 'queued'
+                self._queue.append(job_id)
+            else:
+                job['state'] = 'failed'
+            return True
+
+    def reap(self) -> int:
+        """하트비트가 끊긴 작업을 다시 대기열에 넣음 - 회수한 작업 수 반환"""
+        now = time.time()
+        count = 0
+        with self._lock:
+            for job in self._jobs.values():
+                if job['state'] == 'leased' and job['lease_expires'] < now:
+                    print(f"[코디네이터] 임대 만료, 재대기: {job['id']} ({job['worker']})")
+                    job.update(worker=None, lease_expires=None, error='lease expired', control=None,
+                               speed=0)
+                    if job['attempts'] < self.max_attempts:
+                        job['state'] = 'queued'
+                        self._queue.append(job['id'])
+                    else:
+                        job['state'] = 'failed'
+                    count += 1
+        return count
+
+    def snapshot(self) -> dict:
+        """전체 작업 상태 요약"""
+        with self._lock:
+            jobs = [dict(job) for job in self._jobs.values()]
+        counts = {}
+        speed = 0
+        for job in jobs:
+            counts[job['state']] = counts.get(job['state'], 0) + 1
+            if job['state'] == 'leased':
+                speed += job['speed']
+        return {'counts': counts, 'speed': speed, 'jobs': jobs}
+
+
+def _make_handler(coordinator: Coordinator):
+    """코디네이터 HTTP 요청 핸들러 생성"""
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass  # 요청마다 로그를 남기지 않음
+
+        def _send(self, code: int, payload=None):
+            body = json.dumps(payload, ensure_ascii=False).encode('utf-8') if payload is not None else b''
+            self.send_response(code)
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _read(self) -> dict:
+            length = int(self.headers.get('Content-Length') or 0)
+            return json.loads(self.rfile.read(length) or b'{}')
+
+        def do_GET(self):
+            if self.path == '/jobs':
+                self._send(200, coordinator.snapshot())
+            else:
+                self._send(404, {'error': 'not found'})
+
+        def do_POST(self):
+            try:
+                data = self._read()
+            except ValueError:
+                return self._send(400, {'error': 'invalid json'})
+            parts = self.path.strip('/').split('/')
+
+            if parts == ['jobs']:
+                try:
+                    ids = coordinator.submit(data.get('urls') or [], data.get('kind', 'video'),
+                                             data.get('container'), data.get('format_policy'))
+                except ValueError as e:
+                    return self._send(400, {'error': str(e)})
+                return self._send(200, {'ids': ids})
+            if parts == ['lease']:
+                job = coordinator.lease(data.get('worker', ''))
+                return self._send(200, job) if job else self._send(204)
+            if len(parts) == 3 and parts[0] == 'jobs':
+                job_id, action = parts[1], parts[2]
+                if action == 'heartbeat':
+                    return self._send(200, coordinator.heartbeat(job_id, data.get('worker', ''), data))
+                if action == 'complete':
+                    ok = coordinator.complete(job_id, data.get('worker', ''), bool(data.get('ok')),
+                                              data.get('error'), data.get('metadata'), data.get('stopped'))
+                    return self._send(200, {'ok': ok})
+                if action in ('cancel', 'pause', 'resume'):
+                    return self._send(200, {'ok': coordinator.control(job_id, action)})
+            self._send(404, {'error': 'not found'})
+
+    return Handler
+
+
+def serve_coordinator(host: str = '127.0.0.1', port: int = 8765, lease_timeout: float = 60,
+                      max_attempts: int = 3):
+    """코디네이터 HTTP 서버 실행 (임대 만료 회수 스레드 포함, 기본은 로컬 전용)"""
+    coordinator = Coordinator(lease_timeout=lease_timeout, max_attempts=max_attempts)
+    server = ThreadingHTTPServer((host, port), _make_handler(coordinator))
+
+    def reaper():
+        while True:
+            time.sleep(min(5, lease_timeout / 2))
+            coordinator.reap()
+
+    threading.Thread(target=reaper, daemon=True).start()
+    print(f"[코디네이터] http://{host}:{port} 에서 대기 중")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def call(base_url: str, path: str, payload: Optional[dict] = None, timeout: float = 10):
+    """코디네이터 API 호출 (payload가 있으면 POST) - 응답 JSON 반환 (본문 없으면 None)"""
+    data = json.dumps(payload).encode('utf-8') if payload is not None else None
+    request = urllib.request.Request(base_url.rstrip('/') + path, data=data,
+                                     headers={'Content-Type': 'application/json'})
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        body = response.read()
+    return json.loads(body) if body else None
+
+
+class Worker:
+    """코디네이터에서 작업을 받아 다운로드하고 진행률/하트비트를 보고하는 워커"""
+
+    def __init__(self, coordinator_url: str, output_path: str, worker_id: Optional[str] = None,
+                 heartbeat_interval: float = 5, poll_interval: float = 2, browser_profile: Optional[str] = None):
+        self.coordinator_url = coordinator_url
+        self.output_path = output_path
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.heartbeat_interval = heartbeat_interval
+        self.poll_interval = poll_interval
+        # 브라우저 저장 상태는 워커마다 분리 (동시에 같은 세션 파일을 갱신하지 않도록)
+        self.downloader = UniversalDownloader(browser_profile=browser_profile or self.worker_id)
+
+    def run(self, exit_when_idle: bool = False):
+        """작업 루프 - exit_when_idle이면 대기열이 비었을 때 종료"""
+        print(f"[워커 {self.worker_id}] 시작 (저장 위치: {self.output_path})")
+        while True:
+            try:
+                job = call(self.coordinator_url, '/lease', {'worker': self.worker_id})
+            except (urllib.error.URLError, OSError) as e:
+                print(f"[워커 {self.worker_id}] 코디네이터 연결 실패: {e}")
+                job = None
+            if not job:
+                if exit_when_idle:
+                    return
+                time.sleep(self.poll_interval)
+                continue
+            self._process(job)
+
+    def _process(self, job: dict):
+        """작업 하나 실행 - 하트비트 스레드가 진행률 보고 및 취소/일시정지 요청 전달"""
+        done = threading.Event()
+        control = JobRecord()  # 다운로더가 진행 상황을 숫자로 기록
+        control.start()
+
+        def heartbeat():
+            while not done.wait(self.heartbeat_interval):
+                try:
+                    result = call(self.coordinator_url, f"/jobs/{job['id']}/heartbeat", {
+                        'worker': self.worker_id,
+                        'stage': control.stage,
+                        'percent': control.percent,
+                        'bytes_done': control.bytes_done,
+                        'bytes_total': control.bytes_total,
+                        'speed': control.speed,
+                    })
+                    if not result or not result.get('ok'):
+                        # 다른 워커가 이어받을 수 있도록 부분 데이터를 남기고 중지
+                        print(f"[워커 {self.worker_id}] 임대를 잃음: {job['id']}")
+                        control.pause()
+                    elif result.get('control') == 'cancel':
+                        control.cancel()
+                    elif result.get('control') == 'pause':
+                        control.pause()
+                except (urllib.error.URLError, OSError) as e:
+                    print(f"[워커 {self.worker_id}] 하트비트 실패: {e}")
+
+        print(f"[워커 {self.worker_id}] 작업 시작: {job['id']} {job['url']}")
+        threading.Thread(target=heartbeat, daemon=True).start()
+        metadata = {}
+        # 작업을 하나씩 처리하므로 작업마다 제출 시 지정한 포맷 정책을 적용
+        self.downloader.set_format_policy(FormatPolicy(**(job.get('format_policy') or {})))
+        try:
+            if job['kind'] == 'audio':
+                ok = self.downloader.download_audio(job['url'], self.output_path, None,
+                                                    metadata, control, job['container'])
+            else:
+                ok = self.downloader.download_video(job['url'], self.output_path, None,
+                                                    metadata, control, job['container'])
+            error = None
+        except Exception as e:
+            ok, error = False, str(e)
+        finally:
+            done.set()
+        control.finish(ok)
+        if not ok and error is None and not control.stopped:
+            error = control.error.name.lower()  # not_found / download / ffmpeg / unknown
+
+        # 중지된 작업도 바로 보고하여 슬롯을 반환하고 다음 작업을 받음
+        stopped = control.state if control.stopped else None
+        try:
+            call(self.coordinator_url, f"/jobs/{job['id']}/complete",
+                 {'worker': self.worker_id, 'ok': ok, 'error': error, 'metadata': metadata,
+                  'stopped': stopped})
+        except (urllib.error.URLError, OSError) as e:
+            # 보고 실패 시 임대 만료 후 코디네이터가 다시 대기열에 넣음
+            print(f"[워커 {self.worker_id}] 완료 보고 실패: {e}")
+        result = control.status_text() if stopped else ('완료' if ok else '실패')
+        print(f"[워커 {self.worker_id}] 작업 {result}: {job['id']}")
+
+
+def _run_worker(coordinator_url: str, output_path: str, exit_when_idle: bool, slot: int = 0):
+    """워커 프로세스 진입점 - 브라우저 프로필은 호스트 이름과 프로세스 번호로 고정하여 재시작 후에도 재사용"""
+    # 홈 디렉터리를 공유하는 다른 호스트와 프로필이 겹치지 않도록 호스트 이름 포함
+    Worker(coordinator_url, output_path,
+           browser_profile=f"{socket.gethostname()}-worker{slot}").run(exit_when_idle)
+
+
+def run_workers(coordinator_url: str, output_path: str, processes: int = 1, exit_when_idle: bool = False):
+    """같은 호스트에서 워커 프로세스 여러 개 실행"""
+    if processes <= 1:
+        return _run_worker(coordinator_url, output_path, exit_when_idle)
+    procs = [Process(target=_run_worker, args=(coordinator_url, output_path, exit_when_idle, slot))
+             for slot in range(processes)]
+    for p in procs:
+        p.start()
+    try:
+        for p in procs:
+            p.join()
+    except KeyboardInterrupt:
+        for p in procs:
+            p.terminate()